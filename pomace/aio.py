@@ -0,0 +1,169 @@
+"""Asynchronous interface to run many flows concurrently from one event loop.
+
+Each session owns a browser and a worker thread, so flows still run in
+parallel threads; the event loop only awaits them.
+"""
+
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import log
+
+from . import browser, models, shared, utils
+from .config import settings
+from .enums import Verb
+from .types import GenericBrowser
+
+__all__ = ["Session", "auto", "close", "visit"]
+
+current: ContextVar[Optional["Session"]] = ContextVar("current", default=None)
+sessions: Set["Session"] = set()
+
+
+class Session:
+    """Browser dedicated to one flow and driven from its own worker thread.
+
+    Playwright's synchronous API must be called from the thread that launched
+    it, so every call for a session is dispatched to the same thread.
+    """
+
+    def __init__(self):
+        self.browser: Optional[GenericBrowser] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        sessions.add(self)
+
+    async def __aenter__(self) -> "Session":
+        return self
+
+    async def __aexit__(self, *_exc):
+        await self.close()
+
+    async def run(self, function: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = partial(self._call, function, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def _call(self, function: Callable, *args, **kwargs):
+        if self.browser is None:
+            self.browser = browser.launch()
+        token = shared.session.set(self.browser)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            shared.session.reset(token)
+
+    async def visit(self, url: str) -> "Page":
+        current.set(self)
+        page = await self.run(self._visit, url)
+        return Page(self, page)
+
+    @staticmethod
+    def _visit(url: str) -> models.Page:
+        shared.client.visit(url, settings.browser.size)
+        return models.auto()
+
+    async def auto(self) -> "Page":
+        page = await self.run(models.auto)
+        return Page(self, page)
+
+    async def close(self):
+        if self.browser:
+            await self.run(browser.close, self.browser)
+            self.browser = None
+        self._executor.shutdown()
+        sessions.discard(self)
+        if current.get() is self:
+            current.set(None)
+
+
+class Page:
+    """Wrapper for `pomace.Page` whose actions and browser state are awaitable."""
+
+    def __init__(self, session: Session, page: models.Page):
+        self._session = session
+        self._page = page
+
+    def __repr__(self):
+        return repr(self._page)
+
+    @property
+    def session(self) -> Session:
+        return self._session
+
+    def __str__(self):
+        return str(self._page)
+
+    def __dir__(self):
+        return dir(self._page)
+
+    def __getattr__(self, name: str):
+        verb, _, action = name.partition("_")
+        if action and Verb.validate(verb, action):
+            return partial(self._perform, name)
+        if name in models.Page.STATE or name == "active":
+            # Browser state must be read from the session's own thread
+            return self._session.run(getattr, self._page, name)
+        return getattr(self._page, name)
+
+    async def fill_many(self, values: Dict[str, str]) -> "Page":
+        page = await self._session.run(self._page.fill_many, values)
+        return Page(self._session, page)
+
+    async def perform_batch(self, steps: Iterable[Tuple[str, Optional[str]]]) -> "Page":
+        page = await self._session.run(self._page.perform_batch, list(steps))
+        return Page(self._session, page)
+
+    async def _perform(self, name: str, *args, **kwargs) -> "Page":
+        def call():
+            action = getattr(self._page, name)
+            return action(*args, _page=self._page, **kwargs)
+
+        log.debug(f"Performing {name} on {self._page}")
+        page = await self._session.run(call)
+        return Page(self._session, page)
+
+
+async def visit(url: str) -> Page:
+    """Load a page in the current task's browser, launching one if needed."""
+    utils.locate_models(caller=inspect.currentframe())
+    session = current.get() or Session()
+    return await session.visit(url)
+
+
+async def auto() -> Page:
+    """Determine the current page for the current task's browser."""
+    session = current.get()
+    if session is None:
+        raise RuntimeError("No browser has been visited in this task")
+    return await session.auto()
+
+
+async def close():
+    """Close the current task's browser and its worker thread."""
+    session = current.get()
+    if session:
+        await session.close()
+
+
+def _close_sessions():
+    for session in list(sessions):
+        executor = session._executor  # pylint: disable=protected-access
+        if session.browser:
+            try:
+                executor.submit(browser.close, session.browser).result()
+            except Exception as e:  # pylint: disable=broad-except
+                log.debug(f"Unable to close browser: {e}")
+            session.browser = None
+        executor.shutdown()
+        sessions.discard(session)
+
+
+# Close browsers from their worker threads before those threads are joined
+threading._register_atexit(  # type: ignore # pylint: disable=protected-access
+    _close_sessions
+)
@@ -1,6 +1,15 @@
+import json
+import os
 import platform
 import subprocess
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from queue import Queue
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import log
 import splinter
@@ -10,11 +19,21 @@ from selenium.webdriver.chrome.service import Service
 from splinter.exceptions import DriverNotFoundError
 from webdriver_manager import chrome, firefox
 
+from . import shared
 from .compat import PlaywrightError, playwright
 from .config import settings
 from .types import GenericBrowser, PlaywrightBrowser, SplinterBrowser
 
-__all__ = ["launch", "save_url", "save_size", "close"]
+__all__ = [
+    "launch",
+    "profile",
+    "timings",
+    "save_url",
+    "save_size",
+    "close",
+    "Pool",
+    "Standby",
+]
 
 
 NAMES = ["Firefox", "Chrome"]
@@ -28,6 +47,10 @@ WEBDRIVER_MANAGERS = {
 
 FALLBACK_USER_AGENT = "Mozilla/5.0 Gecko/20100101 Firefox/103.0"
 
+CACHE_DIRECTORY = Path(os.getenv("POMACE_CACHE", Path.home() / ".cache" / "pomace"))
+
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("phases", default=None)
+
 
 def launch() -> GenericBrowser:
     if not settings.browser.name:
@@ -48,49 +71,95 @@ def launch() -> GenericBrowser:
         log.error(f"Unsupported framework: {settings.framework}")
         sys.exit(1)
 
-    return function(settings.browser.name, settings.browser.headless)
+    phases: Dict[str, float] = {}
+    token = _phases.set(phases)
+    try:
+        with phase("total"):
+            instance = function(settings.browser.name, settings.browser.headless)
+    finally:
+        _phases.reset(token)
+    timings(instance).update(phases)
+    details = ", ".join(f"{k}: {v}s" for k, v in phases.items() if k != "total")
+    log.info(f"Launched browser in {phases['total']}s ({details})")
+    return instance
+
+
+def profile() -> Dict[str, object]:
+    """Describe the framework, browser, and mode that `launch()` would use."""
+    name = settings.browser.name.lower()
+    return {
+        "framework": settings.framework.lower(),
+        "browser": NAMES[0].lower() if name == "open" else name,
+        "headless": settings.browser.headless,
+    }
+
+
+def timings(instance: GenericBrowser) -> Dict[str, float]:
+    """Seconds spent in each phase of getting a browser ready."""
+    return vars(instance).setdefault("_timings", {})
 
 
 def launch_playwright_browser(name: str, headless: bool) -> PlaywrightBrowser:
     name = PLAYWRIGHT_BROWSERS.get(name, name)
-    _playwright = playwright().start()
+    with phase("driver"):
+        _playwright = playwright().start()
     try:
         browser = getattr(_playwright, name)
     except AttributeError:
         log.error(f"Unsupported browser: {name}")
         sys.exit(1)
 
-    try:
-        instance = browser.launch(headless=headless)
-    except PlaywrightError as e:
-        if "playwright install" not in str(e):
-            raise e from None  # pylint: disable=raising-bad-type
-        subprocess.run((sys.executable, "-m", "playwright", "install", name))
-        instance = browser.launch(headless=headless)
+    if not os.path.isfile(browser.executable_path):
+        with phase("install"):
+            subprocess.run((sys.executable, "-m", "playwright", "install", name))
+
+    with phase("browser"):
+        try:
+            instance = browser.launch(headless=headless)
+        except PlaywrightError as e:
+            if "playwright install" not in str(e):
+                raise e from None  # pylint: disable=raising-bad-type
+            subprocess.run((sys.executable, "-m", "playwright", "install", name))
+            instance = browser.launch(headless=headless)
 
     setattr(instance, "_playwright", _playwright)
     return instance
 
 
 def launch_splinter_browser(name: str, headless: bool) -> SplinterBrowser:
+    key = f"splinter-{name}"
+    cached = load_cache(key)
+
+    with phase("user agent"):
+        user_agent = cached.get("user_agent") or get_user_agent(name)
+
     options = ChromeOptions()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     config = {
         "headless": headless,
-        "user_agent": get_user_agent(name),
-        "wait_time": 1.0,
+        "user_agent": user_agent,
+        "wait_time": settings.timeouts.act,
     }
     if name == "chrome":
         config["options"] = options
+    if os.path.isfile(cached.get("driver", "")):
+        log.debug(f"Using cached WebDriver: {cached['driver']}")
+        config["service"] = Service(cached["driver"])
 
     try:
         log.debug(f"Browser config: {config}")
-        return splinter.Browser(name, **config)
+        with phase("browser"):
+            instance = splinter.Browser(name, **config)
     except DriverNotFoundError:
         log.error(f"Unsupported browser: {name}")
         sys.exit(1)
     except Exception as e:  # pylint: disable=broad-except
+        if "service" in config:
+            log.warn(f"Unable to use cached WebDriver: {e}")
+            save_cache(key, driver="")
+            return launch_splinter_browser(name, headless)
+
         log.warn(f"Unable to find existing WebDriver: {e}")
 
         if "exited process" in str(e):
@@ -100,10 +169,12 @@ def launch_splinter_browser(name: str, headless: bool) -> SplinterBrowser:
         log.info("Attempting to install compatible WebDriver")
         for driver, manager in WEBDRIVER_MANAGERS.items():
             if driver in str(e).lower():
-                service = Service(manager().install())
+                with phase("driver"):
+                    service = Service(manager().install())
                 config["service"] = service
                 try:
-                    return splinter.Browser(name, **config)
+                    with phase("browser"):
+                        instance = splinter.Browser(name, **config)
                 except OSError as e:
                     if driver == "geckodriver" and "arm" in platform.machine():
                         log.error("Your machine's architecture is not supported")
@@ -112,8 +183,14 @@ def launch_splinter_browser(name: str, headless: bool) -> SplinterBrowser:
                         )
                         sys.exit(1)
                     raise e from None
+                break
+        else:
+            raise e from None  # type: ignore
 
-        raise e from None  # type: ignore
+    if user_agent == FALLBACK_USER_AGENT:
+        user_agent = ""
+    save_cache(key, user_agent=user_agent, driver=get_driver_path(instance))
+    return instance
 
 
 LAUNCHERS = {
@@ -129,10 +206,55 @@ def get_user_agent(browser: str) -> str:
     return user_agent[browser]
 
 
+def get_driver_path(browser: SplinterBrowser) -> str:
+    service = getattr(browser.driver, "service", None)
+    path = getattr(service, "path", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return path
+    return ""
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = _phases.get()
+        if phases is not None:
+            elapsed = phases.get(name, 0.0) + time.perf_counter() - start
+            phases[name] = round(elapsed, 3)
+
+
+def load_cache(key: str) -> Dict[str, str]:
+    try:
+        data = json.loads((CACHE_DIRECTORY / "launch.json").read_text())
+    except (OSError, ValueError):
+        return {}
+    return data.get(key, {})
+
+
+def save_cache(key: str, **values: str):
+    path = CACHE_DIRECTORY / "launch.json"
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        data = {}
+    current = data.setdefault(key, {})
+    if all(current.get(name) == value for name, value in values.items()):
+        return
+    current.update(values)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, sort_keys=True))
+    except OSError as e:
+        log.debug(f"Unable to cache launch details: {e}")
+
+
 def save_url(browser: GenericBrowser):
     if isinstance(browser, PlaywrightBrowser):
-        page = browser.contexts[0].pages[0]
-        url = page.url
+        page = shared.tabs(browser).current
+        url = page.url if page else ""
     else:
         url = browser.url
 
@@ -143,7 +265,9 @@ def save_url(browser: GenericBrowser):
 
 def save_size(browser: GenericBrowser):
     if isinstance(browser, PlaywrightBrowser):
-        page = browser.contexts[0].pages[0]
+        page = shared.tabs(browser).current
+        if page is None:
+            return
         # TODO: Figure out how to get the window size instead
         size: dict = page.viewport_size  # type: ignore
     else:
@@ -161,3 +285,110 @@ def close(browser: GenericBrowser):
         getattr(browser, "_playwright").stop()
     else:
         browser.quit()
+
+
+class Pool:
+    """Set of launched browsers leased to one thread or task at a time.
+
+    Playwright's synchronous API is bound to the thread that started it,
+    so pools of Playwright browsers should be leased from that thread only.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._browsers: List[GenericBrowser] = []
+        self._idle: Queue = Queue()
+
+    def __len__(self):
+        return len(self._browsers)
+
+    @property
+    def available(self) -> int:
+        return self._idle.qsize()
+
+    def start(self):
+        while len(self._browsers) < self.size:
+            instance = launch()
+            self._browsers.append(instance)
+            self._idle.put(instance)
+        log.info(f"Launched {self.size} browser(s)")
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[GenericBrowser]:
+        instance = self._idle.get(timeout=timeout)
+        token = shared.session.set(instance)
+        try:
+            yield instance
+        finally:
+            shared.session.reset(token)
+            self._idle.put(instance)
+
+    def close(self):
+        while self._browsers:
+            instance = self._browsers.pop()
+            try:
+                close(instance)
+            except Exception as e:  # pylint: disable=broad-except
+                log.debug(e)
+        self._idle = Queue()
+
+
+class Standby:
+    """Browser launched in the background to replace the current one.
+
+    Splinter only: Playwright's synchronous API is bound to the thread
+    that started it, so its browsers cannot be handed to another thread.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._browser: Optional[GenericBrowser] = None
+        self._url = ""
+
+    @property
+    def ready(self) -> bool:
+        return self._browser is not None
+
+    def start(self, url: str = ""):
+        if self._thread or self._browser:
+            return
+        log.debug("Launching standby browser in the background")
+        self._thread = threading.Thread(target=self._launch, args=(url,), daemon=True)
+        self._thread.start()
+
+    def _launch(self, url: str):
+        try:
+            instance = launch()
+        except (Exception, SystemExit) as e:  # pylint: disable=broad-except
+            log.warn(f"Unable to launch standby browser: {e}")
+            return
+
+        if url:
+            token = shared.session.set(instance)
+            try:
+                shared.client.visit(url, settings.browser.size)
+            except Exception as e:  # pylint: disable=broad-except
+                log.debug(f"Unable to preload {url} in standby browser: {e}")
+                url = ""
+            finally:
+                shared.session.reset(token)
+
+        self._browser, self._url = instance, url
+
+    def take(
+        self, timeout: Optional[float] = None
+    ) -> Tuple[Optional[GenericBrowser], str]:
+        """Wait for the standby browser and the URL it preloaded, if any."""
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return None, ""
+            self._thread = None
+        instance, url = self._browser, self._url
+        self._browser, self._url = None, ""
+        return instance, url
+
+    def close(self):
+        instance, _url = self.take()
+        if instance:
+            close(instance)
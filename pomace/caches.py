@@ -0,0 +1,272 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from hashlib import blake2b
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Type
+
+import log
+from datafiles import mapper
+
+from . import shared
+from .types import URLPatterns
+
+if TYPE_CHECKING:
+    from .models import Action, Locator, Page
+
+__all__ = ["PageRegistry", "Writer", "ElementCache"]
+
+
+class PageRegistry:
+    """Process-wide index of page models, reloaded only when files change.
+
+    Models are shared by every browser session; `auto()` returns copies that
+    cache their own browser state. Recently matched pages are remembered by
+    URL and a hash of the page's HTML until the domain's models change.
+    """
+
+    MAX_STATES = 256
+
+    def __init__(self, model: Type["Page"]):
+        self._model = model
+        self._pages: Dict[str, Dict[Path, Tuple[float, "Page"]]] = {}
+        self._patterns: Dict[str, URLPatterns["Page"]] = {}
+        self._states: OrderedDict[Tuple[str, int], Tuple[str, "Page"]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def pages(self, name: str) -> List["Page"]:
+        with self._lock:
+            return self._load(name)
+
+    def _load(self, name: str) -> List["Page"]:
+        root = Path("sites", name).resolve()
+        key = str(root)
+        previous = self._pages.get(key, {})
+        current: Dict[Path, Tuple[float, "Page"]] = {}
+        changed = False
+
+        for path in sorted(root.glob("**/*.yml")):
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            entry = previous.get(path)
+            if entry and entry[0] == mtime:
+                current[path] = entry
+                continue
+            parent = path.parent.relative_to(root).as_posix()
+            if parent == ".":
+                continue
+            log.debug(f"Loading page model: {path}")
+            page = self._model.objects.get(name, parent, path.stem)
+            current[path] = mtime, page
+            changed = True
+
+        if changed or current.keys() != previous.keys() or key not in self._patterns:
+            patterns: URLPatterns["Page"] = URLPatterns()
+            for _mtime, page in current.values():
+                patterns.add(page.path, page)
+            self._patterns[key] = patterns
+            self._forget(key)
+
+        self._pages[key] = current
+        return [page for _mtime, page in current.values()]
+
+    def match(self, name: str, path: str) -> List["Page"]:
+        with self._lock:
+            self._load(name)
+            key = str(Path("sites", name).resolve())
+            return self._patterns[key].match(path)
+
+    def remember(self, url: str, state: int, page: "Page"):
+        page = page.__dict__.get("_source", page)
+        with self._lock:
+            for key, entries in self._pages.items():
+                for _mtime, candidate in entries.values():
+                    if candidate is page:
+                        entry = url, state
+                        self._states[entry] = key, page
+                        self._states.move_to_end(entry)
+                        while len(self._states) > self.MAX_STATES:
+                            self._states.popitem(last=False)
+                        return
+
+    def recall(self, url: str, state: int) -> Optional["Page"]:
+        with self._lock:
+            entry = url, state
+            try:
+                _key, page = self._states[entry]
+            except KeyError:
+                return None
+            self._states.move_to_end(entry)
+            return page
+
+    def _forget(self, key: str):
+        entries = [entry for entry, value in self._states.items() if value[0] == key]
+        if entries:
+            log.debug(f"Forgetting {len(entries)} page state(s) for changed models")
+        for entry in entries:
+            del self._states[entry]
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._patterns.clear()
+            self._states.clear()
+
+
+class Writer:
+    """Buffer model changes in memory and write them to disk in batches.
+
+    Text is captured when changes are saved, and a file modified on disk
+    since then is left alone rather than overwritten.
+    """
+
+    INTERVAL = 5.0
+    THRESHOLD = 20
+
+    def __init__(self):
+        self._pending: Dict[
+            Path, Tuple[mapper.Mapper, str, Optional[Tuple[int, int]]]
+        ] = {}
+        self._written: Dict[Path, bytes] = {}
+        self._stale: Set[Path] = set()
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+
+    def __contains__(self, path: Optional[Path]) -> bool:
+        return path in self._pending
+
+    def __len__(self):
+        return len(self._pending)
+
+    def save(self, datafile: mapper.Mapper):
+        while datafile._root:  # pylint: disable=protected-access
+            datafile = datafile._root  # pylint: disable=protected-access
+
+        path: Path = datafile.path  # type: ignore
+        if path in self._stale:
+            log.debug(f"Skipping changes to modified file until reloaded: {path}")
+            return
+
+        text = datafile.text
+        with self._lock:
+            if path in self._pending:
+                stamp = self._pending[path][2]
+            else:
+                stamp = file_stamp(path)
+            self._pending[path] = datafile, text, stamp
+            if len(self._pending) >= self.THRESHOLD:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def discard(self, path: Optional[Path]) -> bool:
+        with self._lock:
+            self._stale.discard(path)  # type: ignore
+            return self._pending.pop(path, None) is not None  # type: ignore
+
+    def stamp(self, path: Optional[Path]) -> Optional[Tuple[int, int]]:
+        entry = self._pending.get(path)  # type: ignore
+        return entry[2] if entry else None
+
+    def wrote(self, path: Optional[Path], digest: bytes) -> bool:
+        return self._written.get(path) == digest  # type: ignore
+
+    def flush(self) -> int:
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            count = 0
+            while self._pending:
+                path, (datafile, text, stamp) = self._pending.popitem()
+                if file_stamp(path) != stamp:
+                    log.warn(f"Discarding buffered changes to modified file: {path}")
+                    self._stale.add(path)
+                    continue
+                log.debug(f"Writing buffered changes to {path}")
+                self._write(path, text)
+                self._written[path] = blake2b(path.read_bytes()).digest()
+                datafile.modified = False
+                count += 1
+
+        return count
+
+    @staticmethod
+    def _write(path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temporary)
+            raise
+
+
+def file_stamp(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()  # type: ignore
+    except (AttributeError, FileNotFoundError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ElementCache:
+    """Elements resolved for each action, kept until the browser navigates."""
+
+    MAX_SIZE = 64
+
+    def __init__(self):
+        self._elements: OrderedDict[
+            Tuple[int, str], Tuple[str, Tuple[str, str, int], object]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._elements)
+
+    def get(self, action: "Action") -> Optional[Tuple["Locator", object]]:
+        key = id(shared.client.browser), str(action)
+        with self._lock:
+            try:
+                url, signature, element = self._elements[key]
+            except KeyError:
+                return None
+        if url != shared.client.url:
+            self.discard(action)
+            return None
+        for locator in action.locators:
+            if (locator.mode, locator.value, locator.index) == signature:
+                with self._lock:
+                    self._elements.move_to_end(key)
+                return locator, element
+        self.discard(action)
+        return None
+
+    def add(self, action: "Action", locator: "Locator", element: object):
+        key = id(shared.client.browser), str(action)
+        signature = locator.mode, locator.value, locator.index
+        with self._lock:
+            self._elements[key] = shared.client.url, signature, element
+            self._elements.move_to_end(key)
+            while len(self._elements) > self.MAX_SIZE:
+                self._elements.popitem(last=False)
+
+    def discard(self, action: "Action"):
+        with self._lock:
+            self._elements.pop((id(shared.client.browser), str(action)), None)
+
+    def clear(self):
+        with self._lock:
+            self._elements.clear()
@@ -7,7 +7,7 @@ from cleo.commands.command import Command, Verbosity
 from cleo.helpers import argument, option
 from startfile import startfile
 
-from . import __version__, models, prompts, server, utils
+from . import __version__, daemon, models, prompts, server, utils
 from .config import settings
 
 VERBOSITY = {
@@ -212,6 +212,42 @@ class CloneCommand(BaseCommand):
         )
 
 
+class DaemonCommand(BaseCommand):
+    name = "daemon"
+    description = "Keep browsers running for other commands to attach to."
+    arguments = []  # type: ignore
+    options = BaseCommand.options[:3] + [
+        option(
+            "browsers",
+            "c",
+            description="Number of browsers to keep running.",
+            flag=False,
+            default="1",
+        ),
+    ]
+
+    def handle(self):
+        self.configure_logging()
+        if self.option("framework"):
+            settings.framework = self.option("framework").lower()
+        prompts.framework_if_unset()
+        if self.option("browser"):
+            settings.browser.name = self.option("browser").lower()
+        prompts.browser_if_unset()
+        settings.browser.headless = self.option("headless")
+        self.handle_command()
+
+    def handle_command(self):
+        instance = daemon.Daemon(int(self.option("browsers")))
+        try:
+            instance.start()
+            instance.serve()
+        except KeyboardInterrupt:
+            log.debug("User stopped daemon")
+        finally:
+            instance.close()
+
+
 class EditCommand(BaseCommand):
     name = "edit"
     description = "Open the configuration file for editing."
@@ -285,6 +321,13 @@ class ServeCommand(BaseCommand):
             "debug",
             description="Run the server in debug mode.",
         ),
+        option(
+            "workers",
+            "w",
+            description="Number of browsers to serve requests concurrently.",
+            flag=False,
+            default="0",
+        ),
     ]
 
     def handle(self):
@@ -296,9 +339,13 @@ class ServeCommand(BaseCommand):
         self.handle_command()
 
     def handle_command(self):
+        count = int(self.option("workers"))
+        if count:
+            server.start(count)
         try:
-            server.app.run(debug=self.option("debug"))
+            server.app.run(debug=self.option("debug"), threaded=True)
         finally:
+            server.stop()
             utils.close_browser()
 
 
@@ -306,6 +353,7 @@ application = Application("pomace", __version__)
 application.add(AliasCommand())
 application.add(CleanCommand())
 application.add(CloneCommand())
+application.add(DaemonCommand())
 application.add(EditCommand())
 application.add(ExecCommand())
 application.add(RunCommand())
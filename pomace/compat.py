@@ -1,4 +1,4 @@
-"""Compatibility layer to handle systems that cannot run Playwright."""
+"""Compatibility layer to handle systems without optional dependencies."""
 
 # pylint: disable=unused-import
 # mypy: ignore-errors
@@ -8,10 +8,12 @@ import sys
 try:
 
     from playwright.sync_api import Browser as PlaywrightBrowser
+    from playwright.sync_api import BrowserContext
     from playwright.sync_api import ElementHandle
     from playwright.sync_api import ElementHandle as PlaywrightElement
     from playwright.sync_api import Error as PlaywrightError
     from playwright.sync_api import Page
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
     from playwright.sync_api import sync_playwright as playwright
 
     if "pytest" in sys.modules:
@@ -24,8 +26,10 @@ except (ImportError, AttributeError):
             return False
 
     PlaywrightBrowser = Missing
+    BrowserContext = Missing
     ElementHandle = Missing
     PlaywrightElement = Missing
     PlaywrightError = None
     Page = Missing
+    PlaywrightTimeoutError = None
     playwright = Missing
@@ -15,12 +15,24 @@ class Browser:
     width: int = 1920
     height: int = 1080
     headless: bool = False
+    load_state: str = "load"
+    standby: bool = False
 
     @property
     def size(self) -> dict:
         return {"width": self.width, "height": self.height}
 
 
+@datafile
+class Timeouts:
+    probe: float = 0.0
+    act: float = 1.0
+    modes: Dict[str, float] = field(default_factory=dict)
+
+    def get(self, mode: str) -> float:
+        return self.modes.get(mode, self.act)
+
+
 @datafile
 class Secret:
     name: str
@@ -43,6 +55,7 @@ class Site:
 class Settings:
     framework: str = ""
     browser: Browser = field(default_factory=Browser)
+    timeouts: Timeouts = field(default_factory=Timeouts)
     url: str = ""
     action: int = 0
     aliases: Dict[str, str] = field(default_factory=dict)
@@ -0,0 +1,212 @@
+"""Keep browsers running between commands behind a local Unix socket."""
+
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from queue import Empty, Queue
+from typing import List, Optional
+
+import log
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.options import ArgOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+from splinter.browser import ChromeWebDriver, FirefoxWebDriver
+
+from . import browser
+from .config import settings
+from .types import PlaywrightBrowser, SplinterBrowser
+
+__all__ = ["Daemon", "Connection"]
+
+SOCKET = browser.CACHE_DIRECTORY / "daemon.sock"
+
+
+class Daemon:
+    """Browsers leased to one client connection at a time.
+
+    Clients only attach when their framework, browser, and headless mode
+    match the daemon's. Between leases, extra windows are closed and cookies
+    are cleared. Storage is only cleared for the last visited site, and so
+    are cookies in Firefox.
+    """
+
+    WAIT = 5.0
+
+    def __init__(self, count: int = 1, path: Path = SOCKET):
+        self.count = count
+        self.path = path
+        self.profile = browser.profile()
+        self._browsers: List[SplinterBrowser] = []
+        self._idle: Queue = Queue()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def start(self):
+        while len(self._browsers) < self.count:
+            instance = browser.launch()
+            if isinstance(instance, PlaywrightBrowser):
+                browser.close(instance)
+                raise RuntimeError("Browser daemon requires Splinter")
+            self._browsers.append(instance)
+            self._idle.put(instance)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+        self._server = socketserver.ThreadingUnixStreamServer(
+            str(self.path), self._handler()
+        )
+        self._server.daemon_threads = True
+        log.info(f"Serving {self.count} browser(s) on {self.path}")
+
+    def serve(self):
+        assert self._server, "Daemon has not been started"
+        self._server.serve_forever()
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.path.exists():
+            self.path.unlink()
+        while self._browsers:
+            browser.close(self._browsers.pop())
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        self._send({"error": f"Invalid request: {e}"})
+                        continue
+                    command = request.get("command")
+                    if command == "attach":
+                        daemon._lease(self, request)  # pylint: disable=protected-access
+                        return
+                    if command == "status":
+                        status = {"browsers": daemon.count, **daemon.status}
+                        self._send({**status, **daemon.profile})
+                    else:
+                        self._send({"error": f"Unknown command: {command}"})
+
+            def _send(self, data: dict):
+                self.wfile.write(json.dumps(data).encode() + b"\n")
+
+        return Handler
+
+    @property
+    def status(self) -> dict:
+        return {"available": self._idle.qsize()}
+
+    def _lease(self, handler: socketserver.StreamRequestHandler, request: dict):
+        if request.get("profile") != self.profile:
+            error = {"error": f"Daemon browsers do not match: {self.profile}"}
+            handler.wfile.write(json.dumps(error).encode() + b"\n")
+            return
+        try:
+            instance = self._idle.get(timeout=self.WAIT)
+        except Empty:
+            error = {"error": f"No browser available after {self.WAIT} seconds"}
+            handler.wfile.write(json.dumps(error).encode() + b"\n")
+            return
+        try:
+            details = {
+                "name": instance.driver.name,
+                "executor": instance.driver.service.service_url,
+                "session": instance.driver.session_id,
+            }
+            handler.wfile.write(json.dumps(details).encode() + b"\n")
+            log.info(f"Leased browser session {details['session']}")
+            for _line in handler.rfile:
+                pass
+        finally:
+            log.info("Browser session released")
+            self._reset(instance)
+            self._idle.put(instance)
+
+    @staticmethod
+    def _reset(instance: SplinterBrowser):
+        driver = instance.driver
+        try:
+            main, *others = driver.window_handles
+            for handle in others:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(main)
+            driver.execute_script(
+                "try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}"
+            )
+            if hasattr(driver, "execute_cdp_cmd"):
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            else:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+        except WebDriverException as e:
+            log.warn(f"Unable to reset browser session: {e}")
+
+
+class Connection:
+    """Client's lease on a browser kept running by the daemon."""
+
+    TIMEOUT = 10.0
+
+    def __init__(self, path: Path = SOCKET):
+        self.path = path
+        self._socket: Optional[socket.socket] = None
+
+    @staticmethod
+    def available(path: Path = SOCKET) -> bool:
+        return os.name == "posix" and path.is_socket()
+
+    @property
+    def attached(self) -> bool:
+        return self._socket is not None
+
+    def attach(self) -> SplinterBrowser:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.TIMEOUT)
+        self._socket.connect(str(self.path))
+        request = {"command": "attach", "profile": browser.profile()}
+        self._socket.sendall(json.dumps(request).encode() + b"\n")
+        details = json.loads(self._socket.makefile().readline())
+        if "error" in details:
+            raise ConnectionError(details["error"])
+        self._socket.settimeout(None)
+        log.info(f"Attaching to browser session {details['session']}")
+        return attach(details["name"], details["executor"], details["session"])
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+
+class _AttachedDriver(RemoteWebDriver):
+    def __init__(self, executor: str, session_id: str, options):
+        self._existing_session_id = session_id
+        super().__init__(command_executor=executor, options=options)
+
+    def start_session(self, capabilities: dict) -> None:
+        self.session_id = self._existing_session_id
+        self.caps = {}
+
+
+def attach(name: str, executor: str, session_id: str) -> SplinterBrowser:
+    """Wrap an existing WebDriver session in a Splinter browser."""
+    options: ArgOptions
+    if "firefox" in name.lower():
+        cls, options = FirefoxWebDriver, FirefoxOptions()
+    else:
+        cls, options = ChromeWebDriver, ChromeOptions()
+    driver = _AttachedDriver(executor, session_id, options)
+    instance = cls.__new__(cls)
+    super(cls, instance).__init__(driver, settings.timeouts.act)
+    return instance
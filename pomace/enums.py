@@ -1,3 +1,4 @@
+import json
 import time
 from enum import Enum
 from typing import Callable, Iterator, Optional, Tuple
@@ -7,8 +8,65 @@ import log
 from selenium.webdriver.common.keys import Keys
 
 from . import shared
+from .compat import PlaywrightTimeoutError
+from .config import settings
 from .types import GenericElement, PlaywrightBrowser
 
+PROBE = """
+([queries, visible]) => queries.map(([kind, selector]) => {
+    const displayed = (element) => Boolean(
+        (element.offsetWidth || element.offsetHeight || element.getClientRects().length)
+        && getComputedStyle(element).visibility !== "hidden"
+    );
+    let elements;
+    try {
+        if (kind === "xpath") {
+            const result = document.evaluate(
+                selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+            );
+            elements = Array.from(
+                {length: result.snapshotLength}, (_, index) => result.snapshotItem(index)
+            );
+        } else {
+            elements = Array.from(document.querySelectorAll(selector));
+        }
+    } catch (error) {
+        return -1;
+    }
+    if (visible) {
+        let index = elements.length;
+        while (index && !displayed(elements[index - 1])) {
+            index--;
+        }
+        return index;
+    }
+    return elements.length;
+})
+"""
+
+FIRST_VISIBLE = """
+([elements, start, describe]) => {
+    for (let index = start; index < elements.length; index++) {
+        const element = elements[index];
+        if (
+            (element.offsetWidth || element.offsetHeight || element.getClientRects().length)
+            && getComputedStyle(element).visibility !== "hidden"
+        ) {
+            return [index, describe ? element.outerHTML : null];
+        }
+    }
+    return [-1, null];
+}
+"""
+
+
+def xpath_literal(value: str) -> Optional[str]:
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return None
+
 
 class Mode(Enum):
 
@@ -24,21 +82,31 @@ class Mode(Enum):
 
     @property
     def finder(self) -> Callable:
-        if isinstance(shared.browser, PlaywrightBrowser):
+        if isinstance(shared.client.browser, PlaywrightBrowser):
             return shared.client.page.query_selector_all
 
         if self is self.PARTIAL_TEXT:
-            return shared.browser.links.find_by_partial_text
+            return shared.client.browser.find_by_xpath
 
         if self is self.ARIA_LABEL:
-            return shared.browser.find_by_css
+            return shared.client.browser.find_by_css
+
+        return getattr(shared.client.browser, f"find_by_{self.value}")
 
-        return getattr(shared.browser, f"find_by_{self.value}")
+    def find(self, value, wait_time: Optional[float] = None) -> GenericElement:
+        """Find elements, waiting up to the configured timeout for this mode.
+
+        Playwright only waits when a timeout is given or set for this mode.
+        """
+        playwright = isinstance(shared.client.browser, PlaywrightBrowser)
+        if wait_time is None and playwright:
+            wait_time = settings.timeouts.modes.get(self.value, 0.0)
+        elif wait_time is None:
+            wait_time = settings.timeouts.get(self.value)
 
-    def find(self, value) -> GenericElement:
         if self is self.ARIA_LABEL:
             value = f'[aria-label="{value}"]'
-        elif isinstance(shared.browser, PlaywrightBrowser):
+        elif playwright:
             if self is self.TEXT:
                 value = f"text={value!r}"
             elif self is self.PARTIAL_TEXT:
@@ -47,7 +115,66 @@ class Mode(Enum):
                 value = f"{self.value}={value}"
             elif self not in [self.CSS, self.XPATH]:
                 value = f"[{self.value}={value!r}]"
-        return self.finder(value)
+
+        if playwright:
+            if wait_time:
+                try:
+                    shared.client.page.wait_for_selector(
+                        value, state="attached", timeout=wait_time * 1000
+                    )
+                except PlaywrightTimeoutError:
+                    pass
+            return self.finder(value)
+
+        if self is self.PARTIAL_TEXT:
+            return self.finder(
+                f'//a[contains(normalize-space(.), "{value}")]',
+                original_find="link by partial text",
+                original_query=value,
+                wait_time=wait_time,
+            )
+        return self.finder(value, wait_time=wait_time)
+
+    def query(self, value: str) -> Optional[Tuple[str, str]]:
+        """Translate a locator value into a script query matching `find`.
+
+        Locators whose finder cannot be reproduced exactly have no query.
+        """
+        if isinstance(shared.client.browser, PlaywrightBrowser):
+            # Playwright selectors pierce shadow roots and match text differently
+            if self is self.XPATH and value.startswith(("//", "..")):
+                return "xpath", value
+            return None
+        if self in {self.CSS, self.TAG}:
+            return "css", value
+        if self is self.XPATH:
+            return "xpath", value
+        if self in {self.NAME, self.ARIA_LABEL}:
+            return "css", f"[{self.value}={json.dumps(value)}]"
+        if self is self.VALUE:
+            return None  # Splinter falls back to matching text
+        literal = xpath_literal(value)
+        if literal is None:
+            return None
+        if self is self.ID:
+            return "xpath", f"(//*[@id={literal}])[1]"
+        if self is self.TEXT:
+            return "xpath", f"//*[text()={literal}]"
+        return "xpath", f"//a[contains(normalize-space(.), {literal})]"
+
+    def absent(self, value: str, html: str) -> bool:
+        """Check whether an HTML snapshot rules out any attribute match.
+
+        Serialized attribute values may be escaped, so only plain values
+        missing from the snapshot are ruled out.
+        """
+        if isinstance(shared.client.browser, PlaywrightBrowser):
+            return False
+        if self not in {self.NAME, self.ID, self.ARIA_LABEL}:
+            return False
+        if not value or any(character in value for character in '&"<>\xa0'):
+            return False
+        return value not in html
 
 
 class Verb(Enum):
@@ -122,19 +249,23 @@ class Verb(Enum):
 
         if wait is None:
             wait = 0.0 if self.updates else 5.0
-        if wait:
-            log.debug(f"Waiting {wait} seconds for URL to change from {previous_url}")
-
-        elapsed = 0.0
-        logged = False
-        while elapsed < wait:
-            time.sleep(0.1)
-            elapsed = round(time.time() - start, 1)
-            current_url = shared.client.url
-            if current_url != previous_url:
-                log.debug(f"URL changed after {elapsed} seconds to {current_url}")
-                time.sleep(delay or 0.5)
-                break
-            if elapsed > 1.0 and not logged:
-                log.info(f"Waiting up to {wait} seconds for the URL to change")
-                logged = True
+        remaining = wait - (time.time() - start)
+        if remaining <= 0:
+            return
+
+        log.debug(f"Waiting {wait} seconds for URL to change from {previous_url}")
+        state = settings.browser.load_state
+        changed = shared.client.wait_for_navigation(
+            previous_url, min(remaining, 1.0), state
+        )
+        if not changed and remaining > 1.0:
+            log.info(f"Waiting up to {wait} seconds for the URL to change")
+            changed = shared.client.wait_for_navigation(
+                previous_url, remaining - 1.0, state
+            )
+
+        elapsed = round(time.time() - start, 1)
+        if changed:
+            log.debug(f"URL changed after {elapsed} seconds to {shared.client.url}")
+        else:
+            log.debug(f"URL unchanged after {elapsed} seconds")
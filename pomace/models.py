@@ -1,12 +1,16 @@
+import atexit
+import dataclasses
+import logging
+import threading
 import time
 from contextlib import suppress
-from copy import copy
 from functools import cached_property
-from typing import Callable, List, Optional, Tuple
+from hashlib import blake2b
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import log
-from bs4 import BeautifulSoup
-from datafiles import datafile, field, mapper
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from datafiles import converters, datafile, field, mapper
 from selenium.common.exceptions import (
     ElementNotInteractableException,
     WebDriverException,
@@ -15,13 +19,17 @@ from splinter.driver.webdriver import WebDriverElement
 from splinter.exceptions import ElementDoesNotExist
 
 from . import prompts, shared
-from .compat import ElementHandle
+from .caches import ElementCache, PageRegistry, Writer, file_stamp
 from .config import settings
-from .enums import Mode, Verb
-from .types import URL, GenericBrowser, PlaywrightBrowser
+from .enums import FIRST_VISIBLE, PROBE, Mode, Verb
+from .types import URL, Fingerprint, GenericBrowser, Stats, hash64
 
 __all__ = ["Locator", "Action", "Page", "auto"]
 
+Counts = Dict[Tuple[str, str], int]
+
+_reloading = threading.Lock()
+
 
 @datafile(order=True)
 class Locator:
@@ -29,6 +37,7 @@ class Locator:
     value: str = field(default="", compare=False)
     index: int = field(default=0, compare=False)
     uses: int = field(default=0, compare=True)
+    stats: str = field(default="", compare=False)
 
     def __repr__(self) -> str:
         return f"<locator {self.mode}={self.value}[{self.index}]>"
@@ -36,32 +45,43 @@ class Locator:
     def __bool__(self) -> bool:
         return bool(self.mode and self.value)
 
-    def find(self) -> Optional[WebDriverElement]:
-        elements = self._mode.find(self.value)
-        index = self.index
-
-        if isinstance(shared.browser, PlaywrightBrowser):
-            try:
-                return elements[index]
-            except IndexError:
-                return None
-
-        try:
-            element = elements[index]
-            assert not isinstance(element, ElementHandle)
-            if index == 0 and not element.visible:
-                html = element.outer_html.replace("\n", "").replace("  ", "")
-                log.debug(f"{self} found invisible element: {html}")
-                index += 1
-                element = elements[index]
-        except ElementDoesNotExist:
+    def find(self, wait_time: Optional[float] = None) -> Optional[WebDriverElement]:
+        elements = self._mode.find(self.value, wait_time)
+        if len(elements) <= self.index:
             log.debug(f"{self} unable to find element")
             return None
 
+        index = self.index
+        handles = [getattr(element, "_element", element) for element in elements]
+        describe = logging.getLogger(__name__).isEnabledFor(logging.DEBUG)
+        try:
+            result = shared.client.evaluate(FIRST_VISIBLE, [handles, index, describe])
+        except Exception as e:  # pylint: disable=broad-except
+            log.debug(f"{self} unable to check visibility: {e}")
+            result = None
+
+        html = ""
+        if isinstance(result, list):
+            visible, html = result
+            if visible < 0:
+                log.debug(f"{self} found no visible elements")
+                return None
+            if visible > index:
+                log.debug(f"{self} skipped {visible - index} invisible element(s)")
+                index = visible
+
         self.index = index
-        html = element.outer_html.replace("\n", "").replace("\t", "").replace("  ", "")
-        log.debug(f"{self} found element: {html}")
-        return element
+        if html:
+            html = html.replace("\n", "").replace("\t", "").replace("  ", "")
+            log.debug(f"{self} found element: {html}")
+        return elements[index]
+
+    def exists(self, counts: Counts) -> bool:
+        try:
+            count = counts[self.mode, self.value]
+        except KeyError:
+            return bool(self.find(settings.timeouts.probe))
+        return count > self.index
 
     def score(self, value: int, *, limit: int = 0) -> bool:
         previous = self.uses
@@ -78,11 +98,46 @@ class Locator:
         log.debug(f"{result} {self} uses to {self.uses}")
         return True
 
+    def record(self, success: bool, seconds: float):
+        stats = Stats.parse(self.stats)
+        stats.record(success, seconds)
+        self.stats = str(stats)
+
+    @property
+    def measured(self) -> bool:
+        return Stats.parse(self.stats).attempts > 0
+
+    @property
+    def cost(self) -> float:
+        return Stats.parse(self.stats).cost
+
     @property
     def _mode(self) -> Mode:
         return Mode(self.mode)
 
 
+class LocatorConverter(converters.Dataclass):
+    """Leave unmeasured stats out of saved locators."""
+
+    DATACLASS = Locator
+    CONVERTERS = {
+        attribute.name: converters.map_type(attribute.type)  # type: ignore
+        for attribute in dataclasses.fields(Locator)
+    }
+
+    @classmethod
+    def to_preserialization_data(cls, python_value, *, default_to_skip=None):
+        data = super().to_preserialization_data(
+            python_value, default_to_skip=default_to_skip
+        )
+        if not data.get("stats"):
+            data.pop("stats", None)
+        return data
+
+
+converters.register(Locator, LocatorConverter)
+
+
 @datafile
 class Action:
     verb: str = ""
@@ -95,6 +150,17 @@ class Action:
 
     @property
     def sorted_locators(self) -> List[Locator]:
+        locators = self._ranked_locators
+        slots = [index for index, locator in enumerate(locators) if locator.measured]
+        fastest = sorted(
+            (locators[index] for index in slots), key=lambda locator: locator.cost
+        )
+        for index, locator in zip(slots, fastest):
+            locators[index] = locator
+        return locators
+
+    @property
+    def _ranked_locators(self) -> List[Locator]:
         locators = [x for x in sorted(self.locators, reverse=True) if x]  # type: ignore
         if all(locator.uses < 0 for locator in locators):
             return locators
@@ -119,16 +185,16 @@ class Action:
     @property
     def _max_locator_uses(self) -> int:
         try:
-            return max(1, self.sorted_locators[1].uses) * 2
+            return max(1, self._ranked_locators[1].uses) * 2
         except IndexError:
-            return max(2, self.sorted_locators[0].uses)
+            return max(2, self._ranked_locators[0].uses)
 
     @property
     def _min_locator_uses(self) -> int:
         try:
-            return min(-1, self.sorted_locators[-2].uses) * 2
+            return min(-1, self._ranked_locators[-2].uses) * 2
         except IndexError:
-            return min(-2, self.sorted_locators[-1].uses)
+            return min(-2, self._ranked_locators[-1].uses)
 
     def __post_init__(self):
         if self.verb and self._verb != Verb.TYPE and not self.sorted_locators:
@@ -148,12 +214,20 @@ class Action:
     def __call__(self, *args, **kwargs) -> "Page":
         page = kwargs.pop("_page", None)
         page = self._call_method(page, *args, **kwargs)
-        self.datafile.save()
+        writer.save(self.datafile)
         page.clean()
         return page
 
     def _call_method(self, page, *args, **kwargs) -> "Page":
-        while self._trying_locators(*args, **kwargs):
+        self._attempt(*args, **kwargs)
+
+        if page and self._verb.updates:
+            return page
+
+        return auto()
+
+    def _attempt(self, *args, _counts: Optional[Counts] = None, **kwargs):
+        while self._trying_locators(*args, _counts=_counts, **kwargs):
             log.error(f"No locators able to find {self.name!r}")
             if prompts.bullet:
                 shared.linebreak = False
@@ -163,12 +237,9 @@ class Action:
             else:
                 break
 
-        if page and self._verb.updates:
-            return page
-
-        return auto()
-
-    def _trying_locators(self, *args, **kwargs) -> bool:
+    def _trying_locators(
+        self, *args, _counts: Optional[Counts] = None, **kwargs
+    ) -> bool:
         if self._verb == Verb.TYPE:
             if "_" in self.name:
                 function = shared.client.type_key_with_modifier(self.name.split("_"))
@@ -177,19 +248,60 @@ class Action:
             self._perform_action(function, *args, **kwargs)
             return False
 
-        for locator in self.sorted_locators:
+        cached = cache.get(self)
+        if cached:
+            locator, element = cached
+            log.debug(f"Using cached element from {locator} for {self.name!r}")
+            function = getattr(element, self.verb)
+            if self._perform_action(function, *args, **kwargs):
+                locator.score(+1, limit=self._max_locator_uses)
+                return False
+            log.debug(f"Discarding cached element from {locator}")
+            cache.discard(self)
+
+        for locator in self._racing_locators(_counts):
             if locator:
                 log.debug(f"Using {locator} to find {self.name!r}")
+                start = time.perf_counter()
                 element = locator.find()
+                elapsed = time.perf_counter() - start
                 if element:
+                    cache.add(self, locator, element)
                     function = getattr(element, self.verb)
                     if self._perform_action(function, *args, **kwargs):
+                        locator.record(True, elapsed)
                         locator.score(+1, limit=self._max_locator_uses)
                         return False
+                    cache.discard(self)
+                locator.record(False, elapsed)
             locator.score(-1, limit=self._min_locator_uses)
 
         return True
 
+    def _racing_locators(self, counts: Optional[Counts] = None) -> List[Locator]:
+        locators = self.sorted_locators
+        if len(locators) < 2:
+            return locators
+
+        keys = [(locator.mode, locator.value) for locator in locators]
+        if counts is not None and not any(counts.get(key) for key in keys):
+            log.debug(f"Probing again for {self}")
+            counts = None
+        if counts is None:
+            counts = probe(locators, visible=True)
+        if not any(counts.get(key) for key in keys):
+            return locators
+
+        visible, hidden = [], []
+        for locator in locators:
+            count = counts.get((locator.mode, locator.value))
+            if count is not None and count <= locator.index:
+                log.debug(f"{locator} has no visible elements")
+                hidden.append(locator)
+            else:
+                visible.append(locator)
+        return visible + hidden
+
     def _perform_action(self, function: Callable, *args, **kwargs) -> bool:
         previous_url = shared.client.url
         delay = kwargs.pop("delay", None)
@@ -207,6 +319,12 @@ class Action:
         except WebDriverException as e:
             log.debug(e)
             return False
+        except Exception as e:  # pylint: disable=broad-except
+            if "not attached to the DOM" not in str(e):
+                raise
+            log.debug(e)
+            return False
+        shared.client.invalidate()
         self._verb.post_action(previous_url, delay, wait, start)
         return True
 
@@ -252,6 +370,10 @@ class Locators:
     def sorted_exclusions(self) -> List[Locator]:
         return [x for x in sorted(self.exclusions, reverse=True) if x]  # type: ignore
 
+    @property
+    def sorted_all(self) -> List[Locator]:
+        return self.sorted_inclusions + self.sorted_exclusions
+
     def clean(self, page, *, force: bool = False) -> int:
         unused_inclusion_locators = []
         unused_exclusion_locators = []
@@ -301,6 +423,8 @@ class Page:
     locators: Locators = field(default_factory=Locators)
     actions: List[Action] = field(default_factory=lambda: [Action()])
 
+    STATE = ("url", "title", "identity", "fingerprint", "text", "html", "soup")
+
     @classmethod
     def at(cls, url: str, *, variant: str = "") -> "Page":
         if shared.client.url != url:
@@ -329,7 +453,7 @@ class Page:
 
     @property
     def browser(self) -> GenericBrowser:
-        return shared.browser
+        return shared.client.browser
 
     @cached_property
     def url(self) -> str:
@@ -341,16 +465,15 @@ class Page:
 
     @cached_property
     def identity(self) -> int:
-        return sum(ord(c) for c in self.text)
+        return self.fingerprint.digest
+
+    @cached_property
+    def fingerprint(self) -> Fingerprint:
+        return Fingerprint.from_soup(self.soup, self.text)
 
     @cached_property
     def text(self) -> str:
-        html = copy(self.soup)
-        for element in html(["script", "style"]):
-            element.extract()
-        lines = (line.strip() for line in html.get_text().splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        return "\n".join(chunk for chunk in chunks if chunk)
+        return "\n".join(extract_text(self.soup))
 
     @cached_property
     def html(self) -> str:
@@ -360,29 +483,49 @@ class Page:
     def soup(self) -> BeautifulSoup:
         return BeautifulSoup(self.html, "html.parser")
 
+    def copy(self, **state) -> "Page":
+        """Create a page sharing this model but caching its own browser state.
+
+        Keyword arguments seed cached state, such as `html` already read.
+        """
+        source = self.__dict__.get("_source", self)
+        page = object.__new__(type(self))
+        page.__dict__.update(source.__dict__)
+        for name in self.STATE:
+            page.__dict__.pop(name, None)
+        page.__dict__.update(state, _source=source)
+        return page
+
     @property
     def active(self) -> bool:
+        return self.detect()
+
+    def detect(self, counts: Optional[Counts] = None) -> bool:
         log.debug(f"Determining if {self!r} is active")
+        self._reload()
 
         url = URL(domain(self.url), URL(self.url).path)
         if self.url_pattern != url:
             log.debug(f"{self!r} is inactive: URL not matched")
             return False
 
+        if counts is None:
+            counts = probe(self.locators.sorted_all, visible=True)
+
         log.debug("Checking that all expected elements can be found")
         for locator in self.locators.sorted_inclusions:
-            if locator.find():
+            if locator.exists(counts):
                 if locator.score(+1):
-                    self.datafile.save()
+                    writer.save(self.datafile)
             else:
                 log.debug(f"{self!r} is inactive: {locator!r} found expected element")
                 return False
 
         log.debug("Checking that no unexpected elements can be found")
         for locator in self.locators.sorted_exclusions:
-            if locator.find():
+            if locator.exists(counts):
                 if locator.score(+1):
-                    self.datafile.save()
+                    writer.save(self.datafile)
                 log.debug(f"{self!r} is inactive: {locator!r} found unexpected element")
                 return False
 
@@ -412,6 +555,7 @@ class Page:
             if settings.dev:
                 log.info(f"Adding placeholder action for {self}")
                 self.actions.append(Action())
+                self.__dict__.pop("_index", None)
             else:
                 log.debug("Placeholder actions are disabled")
         return names
@@ -420,12 +564,11 @@ class Page:
         if "_" in value:
             verb, name = value.split("_", 1)
 
-            with suppress(FileNotFoundError):
-                self.datafile.load()
+            self._reload()
 
-            for action in self.actions:
-                if action.name == name and action.verb == verb:
-                    return action
+            action = self._find_action(verb, name)
+            if action:
+                return action
 
             if Verb.validate(verb, name):
                 action = Action(verb, name)
@@ -442,8 +585,59 @@ class Page:
 
         return object.__getattribute__(self, value)
 
+    def _reload(self):
+        source = self.__dict__.get("_source")
+        if source:
+            with _reloading:
+                source._reload()  # pylint: disable=protected-access
+                names = [name for name in source.__dict__ if name not in self.STATE]
+                self.__dict__.update((name, source.__dict__[name]) for name in names)
+            return
+
+        path = self.datafile.path
+        stamp = file_stamp(path)
+        if stamp is None or self.__dict__.get("_stamp") == stamp:
+            return
+
+        digest = blake2b(path.read_bytes()).digest()  # type: ignore
+        if "_digest" not in self.__dict__ and writer.stamp(path) == stamp:
+            log.debug(f"Keeping buffered changes to {self!r}")
+        elif self.__dict__.get("_digest") != digest and not writer.wrote(path, digest):
+            if writer.discard(path):
+                log.warn(f"Discarding buffered changes to modified file: {path}")
+            log.debug(f"Reloading {self!r} from modified file")
+            self.datafile.load()
+            self.__dict__.pop("_index", None)
+        self.__dict__.update(_stamp=stamp, _digest=digest)
+
+    def _find_action(self, verb: str, name: str) -> Optional[Action]:
+        signature = id(self.actions), len(self.actions)
+        try:
+            index_signature, index = self.__dict__["_index"]
+        except KeyError:
+            index_signature = None
+        if index_signature != signature:
+            index = {}
+            for action in self.actions:
+                index.setdefault((action.verb, action.name), action)
+            self.__dict__["_index"] = signature, index
+
+        action = index.get((verb, name))
+        if action and action.verb == verb and action.name == name:
+            return action
+        return None
+
     def __contains__(self, value):
-        return value in self.text
+        if "text" in self.__dict__ or not value:
+            return value in self.text
+
+        tail = ""
+        for chunk in extract_text(self.soup):
+            window = tail + chunk
+            if value in window:
+                return True
+            tail = (window + "\n")[-len(value) :]
+        return False
 
     def perform(self, name: str, value: str = "", _log=None) -> Tuple["Page", bool]:
         _log = _log or log
@@ -466,6 +660,34 @@ class Page:
 
         return page, transitioned
 
+    def fill_many(self, values: Dict[str, str]) -> "Page":
+        """Fill several fields, then save and detect the page once."""
+        return self.perform_batch(
+            (f"fill_{name}", value) for name, value in values.items()
+        )
+
+    def perform_batch(self, steps: Iterable[Tuple[str, Optional[str]]]) -> "Page":
+        """Perform several actions, then save and detect the page once."""
+        actions = [(getattr(self, name), value) for name, value in steps]
+        counts: Optional[Counts] = probe(
+            [locator for action, _ in actions for locator in action.sorted_locators],
+            visible=True,
+        )
+
+        for action, value in actions:
+            args = () if value is None else (value,)
+            if args:
+                log.info(f"{action.humanized} with {value!r}")
+            else:
+                log.info(f"{action.humanized}")
+            action._attempt(*args, _counts=counts)  # pylint: disable=protected-access
+            if not Verb(action.verb).updates:
+                counts = None
+
+        writer.save(self.datafile)
+        self.clean()
+        return auto()
+
     def clean(self, *, force: bool = False) -> int:
         count = self.locators.clean(self, force=force)
 
@@ -482,22 +704,46 @@ class Page:
             for action in unused_actions:
                 log.info(f"Removed unused {action}")
                 self.actions.remove(action)
+            self.__dict__.pop("_index", None)
 
         for action in self.actions:
             count += action.clean(self, force=force)
 
         if count or force:
-            self.datafile.save()
+            writer.save(self.datafile)
+            if force:
+                writer.flush()
 
         return count
 
 
 def auto(*, detect_patterns: bool = True) -> Page:
+    """Match the current page to a model, creating one if none match.
+
+    The page's HTML is read once per call. It identifies recently matched
+    states, rules out locators before probing, and is cached on the result.
+    """
     matching_pages = []
     found_exact_match = False
 
-    for page in Page.objects.filter(domain=domain(shared.client.url)):
-        if page.active:
+    url = URL(shared.client.url)
+    candidates = registry.match(domain(url.value), url.path)
+    html = shared.client.html if candidates else ""
+    pages = [page.copy(html=html) for page in candidates]
+    state = hash64(html) if pages else None
+    if state is not None:
+        page = registry.recall(url.value, state)
+        if page:
+            log.debug(f"Recalled {page!r} for unchanged page state")
+            return page.copy(html=html)
+
+    counts = probe(
+        (locator for page in pages for locator in page.locators.sorted_all),
+        visible=True,
+        html=html,
+    )
+    for page in pages:
+        if page.detect(counts):
             matching_pages.append(page)
             if page.exact:
                 found_exact_match = True
@@ -512,6 +758,8 @@ def auto(*, detect_patterns: bool = True) -> Page:
                 log.warn(f"Multiple pages matched: {page}")
                 if prompts.bullet:
                     shared.linebreak = False
+        if state is not None:
+            registry.remember(url.value, state, matching_pages[0])
         return matching_pages[0]
 
     if detect_patterns:
@@ -528,6 +776,90 @@ def auto(*, detect_patterns: bool = True) -> Page:
     return page
 
 
+def extract_text(soup: BeautifulSoup) -> Iterator[str]:
+    """Yield visible phrases of text while walking the tree once."""
+    pending: List[str] = []
+    for string in _visible_strings(soup):
+        lines = string.splitlines(keepends=True)
+        unfinished = lines and lines[-1].splitlines() == [lines[-1]]
+        tail = lines.pop() if unfinished else ""
+        if lines:
+            lines[0] = "".join(pending) + lines[0]
+            pending = []
+            for line in lines:
+                yield from _phrases(line)
+        if tail:
+            pending.append(tail)
+    yield from _phrases("".join(pending))
+
+
+def _visible_strings(soup: BeautifulSoup) -> Iterator[str]:
+    stack = list(reversed(soup.contents))
+    while stack:
+        element = stack.pop()
+        if isinstance(element, Tag):
+            if element.name not in {"script", "style"}:
+                stack.extend(reversed(element.contents))
+        elif type(element) in {NavigableString, CData}:
+            yield str(element)
+
+
+def _phrases(line: str) -> Iterator[str]:
+    for phrase in line.strip().split("  "):
+        phrase = phrase.strip()
+        if phrase:
+            yield phrase
+
+
+def probe(
+    locators: Iterable[Locator], *, visible: bool = False, html: str = ""
+) -> Counts:
+    """Count the elements matching many locators in a single browser call.
+
+    With `visible`, counts stop after the last displayed element so that
+    `count > index` agrees with `Locator.find`. Locators ruled out by an
+    `html` snapshot of the page are counted without the browser.
+    """
+    counts: Counts = {}
+    keys: List[Tuple[str, str]] = []
+    queries: List[Tuple[str, str]] = []
+    for locator in locators:
+        key = locator.mode, locator.value
+        if key in counts or key in keys:
+            continue
+        mode = Mode(locator.mode)
+        if html and mode.absent(locator.value, html):
+            counts[key] = 0
+            continue
+        query = mode.query(locator.value)
+        if query:
+            keys.append(key)
+            queries.append(query)
+
+    if not queries:
+        return counts
+
+    try:
+        results = shared.client.evaluate(PROBE, [queries, visible])
+    except Exception as e:  # pylint: disable=broad-except
+        log.debug(f"Unable to probe locators: {e}")
+        return counts
+    if not isinstance(results, list):
+        return counts
+
+    log.debug(f"Probed {len(queries)} locators in one call")
+    counts.update((key, count) for key, count in zip(keys, results) if count >= 0)
+    return counts
+
+
+registry = PageRegistry(Page)
+
+writer = Writer()
+atexit.register(writer.flush)
+
+cache = ElementCache()
+
+
 def domain(url: str) -> str:
     value = URL(url).domain
     with suppress(KeyError):
@@ -1,13 +1,133 @@
+import gzip
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import unquote
 
 import log
-from flask import redirect, request, url_for
-from flask_api import FlaskAPI
+from flask import make_response, redirect, request, url_for
+from flask_api import FlaskAPI, exceptions
 
+from . import browser, models, shared
 from .api import visit
+from .config import settings
+from .types import GenericBrowser
 
 app = FlaskAPI("Pomace")
 
+COOKIE = "pomace_worker"
+
+FIELDS: Dict[str, Callable[[models.Page], object]] = {
+    "id": lambda page: page.identity,
+    "url": lambda page: page.url,
+    "title": lambda page: page.title,
+    "html": lambda page: page.soup.prettify(),
+    "text": lambda page: page.text,
+}
+DEFAULT_FIELDS = ["url", "title"]
+
+MINIMUM_COMPRESSED_SIZE = 1024
+
+
+class Worker:
+    """Browser that serves requests from its own thread, one at a time."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[GenericBrowser] = None
+        self.pending = 0
+        self.busy = 0.0
+        self.started = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+
+    @property
+    def utilization(self) -> float:
+        elapsed = time.time() - self.started
+        return round(self.busy / elapsed, 3) if elapsed else 0.0
+
+    def submit(self, function: Callable, *args) -> Future:
+        with self._lock:
+            self.pending += 1
+        return self._executor.submit(self._call, function, *args)
+
+    def _call(self, function: Callable, *args):
+        start = time.time()
+        try:
+            if self.browser is None:
+                log.info(f"Launching browser for worker {self.index}")
+                self.browser = browser.launch()
+            token = shared.session.set(self.browser)
+            try:
+                return function(*args)
+            finally:
+                shared.session.reset(token)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.busy += time.time() - start
+
+    def close(self):
+        closing = self._executor.submit(self._close_browser)
+        self._executor.shutdown()
+        closing.result()
+
+    def _close_browser(self):
+        if self.browser:
+            browser.close(self.browser)
+            self.browser = None
+
+
+workers: List[Worker] = []
+
+
+def start(count: int):
+    workers.extend(Worker(index) for index in range(count))
+    log.info(f"Serving requests with {count} browser(s)")
+
+
+def stop():
+    while workers:
+        worker = workers.pop()
+        try:
+            worker.close()
+        except Exception as e:  # pylint: disable=broad-except
+            log.debug(e)
+
+
+def choose(value: Optional[str]) -> Worker:
+    if value and value.isdigit() and int(value) < len(workers):
+        return workers[int(value)]
+    return min(workers, key=lambda worker: worker.pending)
+
+
+def navigate(url: str) -> models.Page:
+    if shared.client.url != url:
+        shared.client.visit(url, settings.browser.size)
+    return models.auto()
+
+
+def process(
+    url: str,
+    actions: List[Tuple[str, str]],
+    fields: List[str],
+    load: Callable = visit,
+) -> Tuple[str, bool, dict, List[str]]:
+    page = load(url)
+
+    transitioned = False
+    for action, value in actions:
+        page, transitioned = page.perform(action, value or "<missing>")
+        if transitioned:
+            log.info(f"Transitioned to {page}")
+
+    if transitioned:
+        return page.url, transitioned, {}, []
+
+    data = {name: FIELDS[name](page) for name in fields}
+    return page.url, transitioned, data, dir(page)
+
 
 @app.route("/")
 def index():
@@ -20,27 +140,63 @@ def pomace():
         return redirect("/")
 
     url = request.args["url"]
-    page = visit(url)
+    actions = [(key, value) for key, value in request.args.items() if "_" in key]
+    if "fields" in request.args:
+        fields = [name for name in request.args["fields"].split(",") if name]
+    else:
+        fields = DEFAULT_FIELDS
+    for name in fields:
+        if name not in FIELDS:
+            raise exceptions.ParseError(f"Unknown field: {name}")
 
-    transitioned = False
-    for action, value in request.args.items():
-        if "_" in action:
-            page, transitioned = page.perform(action, value or "<missing>")
-            if transitioned:
-                log.info(f"Transitioned to {page}")
+    worker = None
+    if workers:
+        worker = choose(request.cookies.get(COOKIE))
+        future = worker.submit(process, url, actions, fields, navigate)
+        page_url, transitioned, data, names = future.result()
+    else:
+        page_url, transitioned, data, names = process(url, actions, fields)
 
-    link = unquote(url_for(".pomace", url=page.url, _external=True))
+    link = unquote(url_for(".pomace", url=page_url, _external=True))
     if transitioned:
-        return redirect(link)
-
-    data = {
-        "id": page.identity,
-        "url": page.url,
-        "title": page.title,
-        "html": page.soup.prettify(),
-        "text": page.text,
-        "_self": link,
-        "_actions": {action: link + "&" + action for action in dir(page)},
-    }
+        response = redirect(link)
+    else:
+        data["_self"] = link
+        data["_actions"] = {name: link + "&" + name for name in names}
+        response = make_response(data)
+
+    if worker:
+        response.set_cookie(COOKIE, str(worker.index))
+    return response
+
 
-    return data
+@app.after_request
+def compress(response):
+    if (
+        "gzip" not in request.headers.get("Accept-Encoding", "")
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.content_length is None
+        or response.content_length < MINIMUM_COMPRESSED_SIZE
+    ):
+        return response
+
+    response.set_data(gzip.compress(response.get_data()))
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+@app.route("/status")
+def status():
+    return {
+        "queue": sum(worker.pending for worker in workers),
+        "workers": [
+            {
+                "index": worker.index,
+                "queue": worker.pending,
+                "utilization": worker.utilization,
+            }
+            for worker in workers
+        ],
+    }
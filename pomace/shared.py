@@ -1,101 +1,271 @@
-from typing import Callable, List, Optional
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
 
 import log
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.wait import WebDriverWait
 
-from .compat import Page, PlaywrightError
+from .compat import BrowserContext, Page, PlaywrightError, PlaywrightTimeoutError
 from .types import GenericBrowser, PlaywrightBrowser
 
-__all__ = ["browser", "client", "linebreak"]
+__all__ = ["browser", "client", "linebreak", "tabs"]
 
 browser: GenericBrowser = None
 linebreak: bool = True
 
+# Browser leased to the current thread or task, which takes precedence
+session: ContextVar[Optional[GenericBrowser]] = ContextVar("session", default=None)
+
+READY_STATES = {
+    "commit": {"loading", "interactive", "complete"},
+    "domcontentloaded": {"interactive", "complete"},
+    "load": {"complete"},
+    "networkidle": {"complete"},
+}
+
+
+class Tabs:
+    """Pages of a Playwright browser, reused across visits.
+
+    New pages, including popups, become active when opened. The least
+    recently active pages are closed once there are more than `LIMIT`.
+    """
+
+    LIMIT = 4
+
+    def __init__(self, browser: PlaywrightBrowser):
+        self.browser = browser
+        self.active: Optional[Page] = None
+        self._context: Optional[BrowserContext] = None
+        self._pages: List[Page] = []
+
+    def __len__(self):
+        return len(self._pages)
+
+    @property
+    def current(self) -> Optional[Page]:
+        """Active page, or `None` without opening one if there are no pages."""
+        if self.active is None or self.active.is_closed():
+            self.active = None
+            if self._pages:
+                self.activate(self._pages[-1])
+        return self.active
+
+    @property
+    def page(self) -> Page:
+        return self.current or self.open()
+
+    def open(self, size: Optional[dict] = None) -> Page:
+        page = self._get_context(size).new_page()
+        self._opened(page)
+        if size and page.viewport_size != size:
+            page.set_viewport_size(size)  # type: ignore
+        return page
+
+    def activate(self, page: Page):
+        if page is not self.active:
+            self.active = page
+            page.bring_to_front()
+        self._pages.remove(page)
+        self._pages.append(page)
+
+    def _get_context(self, size: Optional[dict] = None) -> BrowserContext:
+        if self._context is None:
+            if self.browser.contexts:
+                self._context = self.browser.contexts[0]
+                self._pages.extend(self._context.pages)
+            else:
+                self._context = self.browser.new_context(
+                    screen=size, viewport=size  # type: ignore
+                )
+            self._context.on("page", self._opened)
+            for page in self._pages:
+                page.on("close", self._closed)
+        return self._context
+
+    def _opened(self, page: Page):
+        if page not in self._pages:
+            self._pages.append(page)
+            page.on("close", self._closed)
+        self.activate(page)
+        while len(self._pages) > self.LIMIT:
+            oldest = self._pages.pop(0)
+            log.debug(f"Closing least recently used tab: {oldest.url}")
+            oldest.close()
+
+    def _closed(self, page: Page):
+        if page in self._pages:
+            self._pages.remove(page)
+        if page is self.active:
+            self.active = None
+
+
+def tabs(instance: PlaywrightBrowser) -> Tabs:
+    try:
+        return getattr(instance, "_tabs")
+    except AttributeError:
+        value = Tabs(instance)
+        setattr(instance, "_tabs", value)
+        return value
+
 
 class _Client:
+    """Dispatch browser operations to the current thread's browser.
+
+    Selenium URL reads are a WebDriver round trip, so they are cached until
+    the client performs something that may navigate or `URL_TTL` expires.
+    """
+
+    URL_TTL = 1.0
+
+    def __init__(self):
+        self._urls: Dict[int, Tuple[str, float]] = {}
+
+    @property
+    def browser(self) -> GenericBrowser:
+        return session.get() or browser
+
     @property
     def windows(self):
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             return []
 
-        return browser.windows
+        return self.browser.windows
 
     @property
     def page(self) -> Page:
         # Raises an AttributeError for non-Playwright browsers
-        return browser.contexts[0].pages[0]
+        return tabs(self.browser).page
 
     @property
     def url(self) -> str:
-        if browser is None:
+        if self.browser is None:
             return ""
 
-        if isinstance(browser, PlaywrightBrowser):
-            try:
-                self.page.bring_to_front()
-            except IndexError:
-                return ""
-            return self.page.url
+        if isinstance(self.browser, PlaywrightBrowser):
+            # Tracked by Playwright from navigation events without a round trip
+            page = tabs(self.browser).current
+            return page.url if page else ""
+
+        key = id(self.browser)
+        now = time.monotonic()
+        try:
+            url, checked = self._urls[key]
+        except KeyError:
+            pass
+        else:
+            if now - checked < self.URL_TTL:
+                return url
+
+        url = self.browser.url
+        self._urls[key] = url, now
+        return url
 
-        return browser.url
+    def invalidate(self):
+        """Forget the cached URL after something that may navigate."""
+        self._urls.pop(id(self.browser), None)
 
     @property
     def title(self) -> str:
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             return self.page.title()
 
-        return browser.title
+        return self.browser.title
 
     @property
     def html(self) -> str:
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             return self.page.content()
 
-        return browser.html
+        return self.browser.html
 
-    @staticmethod
-    def visit(url: str, size: Optional[dict]) -> None:
+    def visit(self, url: str, size: Optional[dict]) -> None:
         exception = RuntimeError(f"Unable to load {url}")
-        if isinstance(browser, PlaywrightBrowser):
-            page = browser.new_page(screen=size, viewport=size)  # type: ignore
+        if isinstance(self.browser, PlaywrightBrowser):
+            page = tabs(self.browser).page
+            if size and page.viewport_size != size:
+                page.set_viewport_size(size)  # type: ignore
             try:
                 page.goto(url)
             except PlaywrightError:
                 raise exception from None
         else:
-            if size and browser.driver.get_window_size() != size:
-                browser.driver.set_window_size(size["width"], size["height"])
-                browser.driver.set_window_position(0, 0)
-                size = browser.driver.get_window_size()
+            if size and self.browser.driver.get_window_size() != size:
+                self.browser.driver.set_window_size(size["width"], size["height"])
+                self.browser.driver.set_window_position(0, 0)
+                size = self.browser.driver.get_window_size()
                 log.debug(f"Resized browser: {size}")
             try:
-                browser.visit(url)
+                self.browser.visit(url)
             except WebDriverException as e:
                 log.error(e)
                 raise exception from None
+            finally:
+                self.invalidate()
+
+    def wait_for_navigation(
+        self, previous_url: str, timeout: float, state: str
+    ) -> bool:
+        if state not in READY_STATES:
+            log.warn(f"Unknown load state: {state}")
+            state = "load"
+
+        if isinstance(self.browser, PlaywrightBrowser):
+            try:
+                self.page.wait_for_url(
+                    lambda url: url != previous_url,
+                    wait_until=state,  # type: ignore
+                    timeout=timeout * 1000,
+                )
+            except PlaywrightTimeoutError:
+                return False
+            except PlaywrightError as e:
+                log.debug(f"Unable to wait for navigation: {e}")
+                return False
+            return True
+
+        ready_states = READY_STATES[state]
+
+        def navigated(driver) -> bool:
+            if driver.current_url == previous_url:
+                return False
+            return driver.execute_script("return document.readyState") in ready_states
+
+        try:
+            WebDriverWait(
+                self.browser.driver,
+                timeout,
+                poll_frequency=0.05,
+                ignored_exceptions=(WebDriverException,),
+            ).until(navigated)
+        except TimeoutException:
+            return False
+        self.invalidate()
+        return True
 
     def type_key(self, name: str) -> Callable:
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             key = name.capitalize()
             return lambda: self.page.keyboard.press(key)
 
         key = getattr(Keys, name.upper())
-        return ActionChains(browser.driver).send_keys(key).perform
+        return ActionChains(self.browser.driver).send_keys(key).perform
 
     def type_key_with_modifier(self, names: List[str]) -> Callable:
         if len(names) > 2:
             raise ValueError("Multiple modifier keys are not yet supported")
 
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             keys = "+".join(name.capitalize() for name in names)
             return lambda: self.page.keyboard.press(keys)
 
         modifier = getattr(Keys, names[0].upper())
         key = getattr(Keys, names[1].upper())
         return (
-            ActionChains(browser.driver)
+            ActionChains(self.browser.driver)
             .key_down(modifier)
             .send_keys(key)
             .key_up(modifier)
@@ -103,18 +273,25 @@ class _Client:
         )
 
     def execute(self, javascript: str):
-        if isinstance(browser, PlaywrightBrowser):
+        if isinstance(self.browser, PlaywrightBrowser):
             self.page.evaluate(javascript)
         else:
-            browser.execute_script(javascript)
+            self.browser.execute_script(javascript)
+
+    def evaluate(self, function: str, argument):
+        if isinstance(self.browser, PlaywrightBrowser):
+            return self.page.evaluate(function, argument)
+
+        return self.browser.execute_script(
+            f"return ({function})(arguments[0]);", argument
+        )
 
-    @staticmethod
-    def clear_cookies():
+    def clear_cookies(self):
         log.info("Clearing cookies")
-        if isinstance(browser, PlaywrightBrowser):
-            browser.contexts[0].clear_cookies()
+        if isinstance(self.browser, PlaywrightBrowser):
+            self.page.context.clear_cookies()
         else:
-            browser.cookies.delete_all()
+            self.browser.cookies.delete_all()
 
 
 client = _Client()
@@ -2,7 +2,6 @@
 
 """Unit tests configuration file."""
 
-
 import datafiles
 import log
 import pytest
@@ -20,30 +19,32 @@ class MockElement(str):
         return True
 
 
-class MockLinks:
-    def find_by_partial_text(self, value):
-        return [MockElement(f"mockelement:links.partial_text={value}")]
-
-
 class MockBrowser:
 
     url = "http://example.com"
 
     html = "Hello, world!"
 
-    def find_by_name(self, value):
+    wait_time = 1.0
+
+    def find_by_name(self, value, wait_time=None):
         return [MockElement(f"mockelement:name={value}")]
 
-    def find_by_css(self, value):
+    def find_by_css(self, value, wait_time=None):
         return [MockElement(f"mockelement:css={value}")]
 
-    links = MockLinks()
+    def find_by_xpath(self, value, wait_time=None, **kwargs):
+        return [MockElement(f"mockelement:xpath={value}")]
+
+    def execute_script(self, script, *args):
+        return None
 
 
 @pytest.fixture
 def mockbrowser(monkeypatch):
     browser = MockBrowser()
     monkeypatch.setattr(shared, "browser", browser)
+    monkeypatch.setattr(shared.client, "_urls", {})
     return browser
 
 
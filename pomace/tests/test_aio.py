@@ -0,0 +1,97 @@
+# pylint: disable=expression-not-assigned,unused-variable,redefined-outer-name,unused-argument
+
+import asyncio
+import threading
+
+import pytest
+
+from .. import aio, shared
+from ..models import Page
+
+
+@pytest.fixture
+def close(mocker):
+    return mocker.patch.object(aio.browser, "close")
+
+
+@pytest.fixture
+def session(mocker, mockbrowser, close):
+    mocker.patch.object(aio.browser, "launch", return_value=mockbrowser)
+    mocker.patch.object(shared.client, "visit")
+    session = aio.Session()
+    yield session
+    asyncio.run(session.close())
+
+
+def describe_session():
+    def it_runs_calls_against_its_own_browser(expect, session, mockbrowser):
+        browser = asyncio.run(session.run(lambda: shared.client.browser))
+        expect(browser).is_(mockbrowser)
+        expect(shared.session.get()) == None
+
+    def it_wraps_pages_with_awaitable_actions(expect, session, mocker):
+        page = Page("example.com", "login")
+        mocker.patch.object(aio.models, "auto", return_value=page)
+        mocker.patch.object(Page, "__getattr__", return_value=lambda *_a, **_k: page)
+
+        async def flow():
+            page = await session.visit("http://example.com/login")
+            return await page.fill_email("foo@bar.com")
+
+        result = asyncio.run(flow())
+        expect(result.url_pattern) == page.url_pattern
+
+    def it_reads_browser_state_from_the_session(
+        expect, session, mockbrowser, mocker, monkeypatch
+    ):
+        monkeypatch.setattr(shared, "browser", None)
+        monkeypatch.setattr(mockbrowser, "title", "Example", raising=False)
+        mocker.patch.object(
+            aio.models, "auto", return_value=Page("example.com", "login").copy()
+        )
+
+        async def flow():
+            page = await session.visit("http://example.com/login")
+            return await page.title
+
+        expect(asyncio.run(flow())) == "Example"
+
+
+def describe_visit():
+    def it_reuses_the_current_session_until_closed(expect, session, close, mocker):
+        page = Page("example.com", "login")
+        mocker.patch.object(aio.models, "auto", return_value=page)
+        mocker.patch.object(aio.utils, "locate_models")
+
+        async def flow():
+            first = await aio.visit("http://example.com/login")
+            second = await aio.visit("http://example.com/login")
+            await aio.close()
+            return first.session, second.session
+
+        first, second = asyncio.run(flow())
+        expect(first).is_(second)
+        expect(aio.sessions).excludes(first)
+        expect(close.call_count) == 1
+
+
+def describe_auto():
+    def it_requires_a_visited_session(expect):
+        with expect.raises(RuntimeError):
+            asyncio.run(aio.auto())
+
+
+def describe_close_sessions():
+    def it_closes_browsers_from_their_worker_threads(expect, session, mocker):
+        threads = []
+        mocker.patch.object(
+            aio.browser,
+            "close",
+            side_effect=lambda _: threads.append(threading.get_ident()),
+        )
+        worker = asyncio.run(session.run(threading.get_ident))
+
+        aio._close_sessions()  # pylint: disable=protected-access
+
+        expect(threads) == [worker]
+        expect(aio.sessions).excludes(session)
@@ -1,9 +1,19 @@
-# pylint: disable=unused-variable,expression-not-assigned
+# pylint: disable=unused-variable,expression-not-assigned,redefined-outer-name
 
-from pomace import browser
+from unittest.mock import Mock
+
+import pytest
+
+from pomace import browser, shared
 from pomace.config import settings
 
 
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser, "CACHE_DIRECTORY", tmp_path)
+    return tmp_path
+
+
 def describe_launch():
     def it_requires_a_browser_to_be_set(expect):
         settings.browser.name = ""
@@ -29,3 +39,83 @@ def describe_launch():
         mocker.patch.object(browser.splinter, "Browser")
         browser.launch()
         expect(settings.browser.name) == "firefox"
+
+    def it_caches_launch_details(expect, mocker, tmp_path):
+        settings.framework = "splinter"
+        settings.browser.name = "chrome"
+        driver = tmp_path / "chromedriver"
+        driver.touch()
+        instance = mocker.patch.object(browser.splinter, "Browser").return_value
+        instance.driver.service.path = str(driver)
+        get_user_agent = mocker.patch.object(
+            browser, "get_user_agent", return_value="Chrome/110"
+        )
+
+        browser.launch()
+        browser.launch()
+
+        expect(get_user_agent.call_count) == 1
+        config = browser.splinter.Browser.call_args.kwargs
+        expect(config["user_agent"]) == "Chrome/110"
+        expect(config["service"].path) == str(driver)
+
+    def it_reports_launch_phases(expect, mocker):
+        settings.framework = "splinter"
+        settings.browser.name = "firefox"
+        mocker.patch.object(browser.splinter, "Browser")
+        instance = browser.launch()
+        expect(sorted(browser.timings(instance))) == ["browser", "total", "user agent"]
+
+    def it_keeps_timings_for_each_launch(expect, mocker):
+        settings.framework = "splinter"
+        settings.browser.name = "firefox"
+        mocker.patch.object(browser.splinter, "Browser", side_effect=[Mock(), Mock()])
+        first = browser.launch()
+        second = browser.launch()
+        expect(browser.timings(first)).is_not(browser.timings(second))
+        expect(browser.timings(first)).contains("total")
+
+
+def describe_pool():
+    @pytest.fixture
+    def pool(mocker):
+        mocker.patch.object(browser, "launch", side_effect=object)
+        mocker.patch.object(browser, "close")
+        pool = browser.Pool(2)
+        pool.start()
+        return pool
+
+    def it_launches_browsers_up_front(expect, pool):
+        expect(len(pool)) == 2
+        expect(pool.available) == 2
+
+    def it_binds_leased_browsers_to_the_client(expect, pool):
+        with pool.lease() as instance:
+            expect(shared.client.browser).is_(instance)
+            expect(pool.available) == 1
+        expect(shared.client.browser).is_not(instance)
+        expect(pool.available) == 2
+
+    def it_closes_all_browsers(expect, pool, mocker):
+        close = mocker.patch.object(browser, "close")
+        pool.close()
+        expect(close.call_count) == 2
+        expect(len(pool)) == 0
+
+
+def describe_standby():
+    def it_launches_a_browser_in_the_background(expect, mocker):
+        instance = object()
+        mocker.patch.object(browser, "launch", return_value=instance)
+        standby = browser.Standby()
+        standby.start()
+
+        expect(standby.take(timeout=5)) == (instance, "")
+        expect(standby.ready) == False
+
+    def it_ignores_launch_failures(expect, mocker):
+        mocker.patch.object(browser, "launch", side_effect=SystemExit(1))
+        standby = browser.Standby()
+        standby.start()
+
+        expect(standby.take(timeout=5)) == (None, "")
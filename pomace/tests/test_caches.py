@@ -0,0 +1,287 @@
+# pylint: disable=expression-not-assigned,unused-variable,redefined-outer-name,unused-argument
+
+import os
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from .. import models, shared
+from ..caches import ElementCache, PageRegistry, Writer
+from ..models import Action, Locator, Page
+from .conftest import MockElement
+
+
+@pytest.fixture
+def action():
+    return Action("fill", "email")
+
+
+def describe_page_registry():
+    @pytest.fixture
+    def registry(tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for path in ["@", "items/{item}", "items/new"]:
+            Page("example.com", path).datafile.save()
+        return PageRegistry(Page)
+
+    def describe_pages():
+        def it_loads_pages_for_one_domain(expect, registry):
+            Page("example.org").datafile.save()
+            paths = [page.path for page in registry.pages("example.com")]
+            expect(paths) == ["@", "items/new", "items/{item}"]
+
+        def it_reuses_unchanged_pages(expect, registry):
+            pages = registry.pages("example.com")
+            expect(registry.pages("example.com")[0]).is_(pages[0])
+
+        def it_reloads_changed_pages(expect, registry):
+            page = registry.pages("example.com")[0]
+            page.datafile.path.write_text("locators: {}\n")
+            os.utime(page.datafile.path, (0, 0))
+            expect(registry.pages("example.com")[0]).is_not(page)
+
+        def it_forgets_deleted_pages(expect, registry):
+            page = registry.pages("example.com")[0]
+            page.datafile.path.unlink()
+            expect(len(registry.pages("example.com"))) == 2
+
+    def describe_recall():
+        def it_returns_remembered_pages(expect, registry):
+            page = registry.pages("example.com")[0]
+            registry.remember("https://example.com", 42, page)
+            expect(registry.recall("https://example.com", 42)).is_(page)
+            expect(registry.recall("https://example.com", 1)) == None
+
+        def it_forgets_pages_when_models_change(expect, registry):
+            page = registry.pages("example.com")[0]
+            registry.remember("https://example.com", 42, page)
+            os.utime(page.datafile.path, (0, 0))
+            registry.pages("example.com")
+            expect(registry.recall("https://example.com", 42)) == None
+
+        def it_forgets_pages_when_models_are_added(expect, registry):
+            page = registry.pages("example.com")[0]
+            registry.remember("https://example.com", 42, page)
+            Page("example.com", "items/{item}/edit").datafile.save()
+            registry.pages("example.com")
+            expect(registry.recall("https://example.com", 42)) == None
+
+        def it_reads_the_html_once_per_match(
+            expect, registry, mockbrowser, monkeypatch
+        ):
+            reads = []
+
+            def html(_client):
+                reads.append(1)
+                return mockbrowser.html
+
+            monkeypatch.setattr(models, "registry", registry)
+            monkeypatch.setattr(type(shared.client), "html", property(html))
+            page = models.auto()
+
+            expect(page.text) == "Hello, world!"
+            expect(len(reads)) == 1
+
+        def it_skips_parsing_and_probing_unchanged_pages(
+            expect, registry, mockbrowser, monkeypatch
+        ):
+            monkeypatch.setattr(models, "registry", registry)
+            page = models.auto()
+
+            def fail(*_args, **_kwargs):
+                raise AssertionError("page state should have been recalled")
+
+            monkeypatch.setattr(models, "probe", fail)
+            monkeypatch.setattr(models, "BeautifulSoup", fail)
+            expect(models.auto()) == page
+
+    def describe_sessions():
+        def it_shares_models_between_browsers(expect, registry, monkeypatch):
+            monkeypatch.setattr(shared, "browser", object())
+            pages = registry.pages("example.com")
+            monkeypatch.setattr(shared, "browser", object())
+            expect(registry.pages("example.com")[0]).is_(pages[0])
+
+    def describe_copy():
+        def it_returns_fresh_pages_from_auto(
+            expect, registry, mockbrowser, monkeypatch
+        ):
+            monkeypatch.setattr(models, "registry", registry)
+            before = models.auto()
+            expect(before.url) == "http://example.com"
+
+            monkeypatch.setattr(mockbrowser, "url", "http://example.com/items/42")
+            shared.client.invalidate()
+            after = models.auto()
+
+            expect(after).is_not(before)
+            expect(before.url) == "http://example.com"
+            expect(after.url) == "http://example.com/items/42"
+
+        def it_shares_the_model_with_the_registry(expect, registry):
+            page = registry.pages("example.com")[0]
+            copy = page.copy()
+            copy.locators.inclusions.append(Locator("id", "username"))
+            expect(page.locators.inclusions) == copy.locators.inclusions
+
+    def describe_match():
+        def it_filters_by_url_pattern(expect, registry):
+            paths = [page.path for page in registry.match("example.com", "items/42")]
+            expect(paths) == ["items/{item}"]
+
+
+def describe_writer():
+    @pytest.fixture
+    def writer():
+        writer = Writer()
+        yield writer
+        writer.flush()
+
+    @pytest.fixture
+    def page(tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        page = Page("example.com", "login")
+        page.datafile.save()
+        return page
+
+    def it_buffers_changes_until_flushed(expect, writer, page):
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        expect(page.datafile.path.read_text()).excludes("username")
+        expect(page.datafile.path in writer) == True
+
+        expect(writer.flush()) == 1
+        expect(page.datafile.path.read_text()).contains("username")
+        expect(len(writer)) == 0
+
+    def it_merges_changes_to_the_same_page(expect, writer, page):
+        action = getattr(page, "fill_email")
+        writer.save(page.datafile)
+        writer.save(action.datafile)
+        expect(len(writer)) == 1
+
+    def it_flushes_at_the_threshold(expect, writer, page, monkeypatch):
+        monkeypatch.setattr(writer, "THRESHOLD", 1)
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        expect(page.datafile.path.read_text()).contains("username")
+
+    def it_writes_text_captured_when_saved(expect, writer, page):
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        page.locators.inclusions = [Locator("id", "password", uses=3)]
+        writer.flush()
+        expect(page.datafile.path.read_text()).contains("username")
+
+    def it_keeps_files_modified_after_saving(expect, writer, page):
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        page.datafile.path.write_text("locators:\n  inclusions: []\n# edited\n")
+        expect(writer.flush()) == 0
+        expect(page.datafile.path.read_text()).contains("edited")
+
+    def it_reloads_pages_modified_after_saving(expect, page, monkeypatch):
+        writer = Writer()
+        monkeypatch.setattr(models, "writer", writer)
+        page._reload()  # pylint: disable=protected-access
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        page.datafile.path.write_text("locators:\n  inclusions: []\n# edited\n")
+
+        page._reload()  # pylint: disable=protected-access
+
+        expect(page.locators.inclusions) == []
+        expect(len(writer)) == 0
+
+    def it_keeps_hand_edits_made_after_detection(expect, page, monkeypatch):
+        writer = Writer()
+        monkeypatch.setattr(models, "writer", writer)
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        page.datafile.path.write_text(
+            "locators:\n  exclusions:\n    - mode: id\n      value: error\n"
+        )
+
+        getattr(page, "click_go")
+        expect(len(writer)) == 0
+        writer.save(page.datafile)
+        writer.flush()
+
+        expect(page.datafile.path.read_text()).contains("error")
+        expect(page.datafile.path.read_text()).excludes("username")
+
+    def it_skips_saves_after_discarding_changes(expect, page, monkeypatch):
+        writer = Writer()
+        monkeypatch.setattr(models, "writer", writer)
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        page.datafile.path.write_text("locators: {}\n# edited\n")
+        writer.flush()
+
+        writer.save(page.datafile)
+        writer.flush()
+
+        expect(page.datafile.path.read_text()).contains("edited")
+
+    def it_does_not_reload_its_own_writes(expect, page, monkeypatch):
+        writer = Writer()
+        monkeypatch.setattr(models, "writer", writer)
+        page._reload()  # pylint: disable=protected-access
+        page.locators.inclusions = [Locator("id", "username", uses=3)]
+        writer.save(page.datafile)
+        writer.flush()
+        page.locators.exclusions = [Locator("id", "error", uses=3)]
+        writer.save(page.datafile)
+
+        page._reload()  # pylint: disable=protected-access
+
+        expect(len(page.locators.exclusions)) == 1
+        expect(len(writer)) == 1
+        writer.flush()
+
+
+def describe_element_cache():
+    @pytest.fixture
+    def cache():
+        return ElementCache()
+
+    def it_reuses_elements_until_the_url_changes(
+        expect, cache, action, mockbrowser, monkeypatch
+    ):
+        locator = action.locators[0]
+        cache.add(action, locator, "element")
+        expect(cache.get(action)) == (locator, "element")
+
+        monkeypatch.setattr(mockbrowser, "url", "http://example.com/other")
+        shared.client.invalidate()
+        expect(cache.get(action)) == None
+        expect(len(cache)) == 0
+
+    def it_forgets_elements_for_changed_locators(expect, cache, action, mockbrowser):
+        locator = action.locators[0]
+        cache.add(action, locator, "element")
+        locator.index = 1
+        expect(cache.get(action)) == None
+
+    def it_replaces_stale_elements(expect, mockbrowser, monkeypatch):
+        filled = []
+
+        class StaleElement:
+            def fill(self, value):
+                raise WebDriverException("stale element reference")
+
+        class Element(MockElement):
+            def fill(self, value):
+                filled.append(value)
+
+        element = Element("email")
+        monkeypatch.setattr(mockbrowser, "find_by_name", lambda *_, **__: [element])
+        monkeypatch.setattr(models, "cache", ElementCache())
+        action = Action("fill", "email", [Locator("name", "email", uses=1)])
+        models.cache.add(action, action.locators[0], StaleElement())
+
+        failed = action._trying_locators("foo")  # pylint: disable=protected-access
+
+        expect(failed) == False
+        expect(filled) == ["foo"]
+        expect(models.cache.get(action)) == (action.locators[0], element)
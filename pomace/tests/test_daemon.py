@@ -0,0 +1,105 @@
+# pylint: disable=unused-variable,expression-not-assigned,redefined-outer-name
+
+import json
+import socket
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from pomace import daemon
+
+
+def describe_daemon():
+    @pytest.fixture
+    def close(mocker):
+        return mocker.patch.object(daemon.browser, "close")
+
+    @pytest.fixture
+    def server(tmp_path, mocker, close):  # pylint: disable=unused-argument
+        instance = Mock()
+        instance.driver.name = "chrome"
+        instance.driver.service.service_url = "http://localhost:9515"
+        instance.driver.session_id = "abc123"
+        instance.driver.window_handles = ["main", "popup"]
+        mocker.patch.object(daemon.browser, "launch", return_value=instance)
+        mocker.patch.object(daemon, "attach", side_effect=lambda *args: args)
+
+        server = daemon.Daemon(1, tmp_path / "daemon.sock")
+        server.start()
+        threading.Thread(target=server.serve, daemon=True).start()
+        yield server
+        server.close()
+
+    def it_leases_browser_sessions_to_connections(expect, server):
+        connection = daemon.Connection(server.path)
+        expect(connection.available(server.path)) == True
+
+        details = connection.attach()
+
+        expect(details) == ("chrome", "http://localhost:9515", "abc123")
+        expect(server.status) == {"available": 0}
+        connection.close()
+
+    def it_releases_sessions_when_connections_close(expect, server):
+        connection = daemon.Connection(server.path)
+        connection.attach()
+        connection.close()
+
+        for _ in range(50):
+            if server.status["available"]:
+                break
+            time.sleep(0.01)
+        expect(server.status) == {"available": 1}
+
+    def it_resets_sessions_when_released(expect, server):
+        connection = daemon.Connection(server.path)
+        connection.attach()
+        connection.close()
+
+        instance = server._browsers[0]  # pylint: disable=protected-access
+        for _ in range(50):
+            if instance.driver.get.called:
+                break
+            time.sleep(0.01)
+        instance.driver.switch_to.window.assert_called_with("main")
+        expect(instance.driver.close.call_count) == 1
+        instance.driver.execute_cdp_cmd.assert_called_once_with(
+            "Network.clearBrowserCookies", {}
+        )
+        instance.driver.get.assert_called_once_with("about:blank")
+
+    def it_refuses_leases_for_other_browsers(expect, server, monkeypatch):
+        framework = server.profile["framework"] + "-other"
+        monkeypatch.setattr(daemon.browser.settings, "framework", framework)
+        connection = daemon.Connection(server.path)
+
+        with pytest.raises(ConnectionError):
+            connection.attach()
+        connection.close()
+        expect(server.status) == {"available": 1}
+
+    def it_refuses_leases_when_no_browser_is_free(server, monkeypatch):
+        monkeypatch.setattr(daemon.Daemon, "WAIT", 0.01)
+        first = daemon.Connection(server.path)
+        first.attach()
+
+        second = daemon.Connection(server.path)
+        with pytest.raises(ConnectionError):
+            second.attach()
+        second.close()
+        first.close()
+
+    def it_replies_with_errors_to_malformed_requests(expect, server):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(server.path))
+            client.sendall(b"attach\n")
+            reply = json.loads(client.makefile().readline())
+
+        expect(reply["error"]).startswith("Invalid request")
+
+    def it_removes_the_socket_when_closed(expect, server, close):
+        server.close()
+        expect(server.path.exists()) == False
+        expect(close.call_count) == 1
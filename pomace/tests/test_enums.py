@@ -1,6 +1,67 @@
 # pylint: disable=expression-not-assigned,unused-variable,redefined-outer-name,unused-argument
 
-from ..enums import Verb
+import pytest
+
+from .. import enums, shared
+from ..config import settings
+from ..enums import Mode, Verb
+
+
+def describe_mode():
+    def describe_query():
+        def with_attribute(expect):
+            expect(Mode("name").query("email")) == ("css", '[name="email"]')
+
+        def with_text(expect):
+            expect(Mode("text").query("Sign In")) == ("xpath", '//*[text()="Sign In"]')
+
+        def with_quotes_in_text(expect):
+            expect(Mode("text").query('it\'s "quoted"')) == None
+
+        def with_value(expect):
+            expect(Mode("value").query("Sign In")) == None
+
+        def with_id(expect):
+            expect(Mode("id").query("email")) == ("xpath", '(//*[@id="email"])[1]')
+
+        def with_partial_text(expect):
+            expect(Mode("text (partial)").query("Forgot")) == (
+                "xpath",
+                '//a[contains(normalize-space(.), "Forgot")]',
+            )
+
+    def describe_absent():
+        def with_missing_attribute(expect, mockbrowser):
+            expect(Mode("name").absent("email", '<input name="user">')) == True
+
+        def with_present_attribute(expect, mockbrowser):
+            expect(Mode("name").absent("email", '<input name="email">')) == False
+
+        def with_escaped_attribute(expect, mockbrowser):
+            expect(Mode("id").absent("a&b", '<input id="a&amp;b">')) == False
+
+        def with_css(expect, mockbrowser):
+            expect(Mode("css").absent("#email", "<input>")) == False
+
+    def describe_find():
+        @pytest.fixture
+        def page(mockbrowser, monkeypatch, mocker):
+            page = mocker.Mock()
+            monkeypatch.setattr(enums, "PlaywrightBrowser", type(mockbrowser))
+            monkeypatch.setattr(type(shared.client), "page", property(lambda _: page))
+            return page
+
+        def it_skips_waiting_on_playwright_by_default(expect, page):
+            Mode("css").find("input")
+            expect(page.wait_for_selector.called) == False
+            page.query_selector_all.assert_called_once_with("input")
+
+        def it_waits_on_playwright_for_configured_modes(expect, page, mocker):
+            mocker.patch.object(settings.timeouts, "modes", {"css": 2.0})
+            Mode("css").find("input")
+            page.wait_for_selector.assert_called_once_with(
+                "input", state="attached", timeout=2000.0
+            )
 
 
 def describe_verb():
@@ -32,3 +93,22 @@ def describe_verb():
                 ("css", '[placeholder="First Name"]'),
                 ("id", "FirstName"),
             ]
+
+    def describe_post_action():
+        def it_waits_for_navigation_after_clicks(expect, mockbrowser, monkeypatch):
+            calls = []
+
+            def wait_for_navigation(previous_url, timeout, state):
+                calls.append((previous_url, timeout, state))
+                return True
+
+            monkeypatch.setattr(
+                shared.client, "wait_for_navigation", wait_for_navigation
+            )
+            Verb("click").post_action("http://example.com/login")
+
+            expect(calls) == [("http://example.com/login", 1.0, "load")]
+
+        def it_skips_waiting_after_fills(expect, mockbrowser, monkeypatch):
+            monkeypatch.setattr(shared.client, "wait_for_navigation", None)
+            Verb("fill").post_action("http://example.com/login")
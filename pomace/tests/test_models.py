@@ -3,7 +3,9 @@
 import pytest
 import requests
 
-from ..models import Action, Locator, Page
+from .. import models
+from ..config import settings
+from ..models import Action, Locator, Page, probe
 
 
 @pytest.fixture
@@ -45,12 +47,65 @@ def describe_locator():
 
         def it_can_find_links_by_partial_text(expect, mockbrowser, locator):
             locator.mode = "text (partial)"
-            expect(locator.find()) == "mockelement:links.partial_text=email"
+            expect(locator.find()) == (
+                'mockelement:xpath=//a[contains(normalize-space(.), "email")]'
+            )
 
         def it_can_find_links_by_aria_label(expect, mockbrowser, locator):
             locator.mode = "aria-label"
             expect(locator.find()) == 'mockelement:css=[aria-label="email"]'
 
+        def it_skips_invisible_elements(expect, mockbrowser, locator, monkeypatch):
+            elements = ["hidden", "visible"]
+            monkeypatch.setattr(mockbrowser, "find_by_name", lambda *_, **__: elements)
+            monkeypatch.setattr(
+                mockbrowser, "execute_script", lambda *_: [1, "<input>"]
+            )
+            expect(locator.find()) == "visible"
+            expect(locator.index) == 1
+
+        def it_returns_none_when_hidden(expect, mockbrowser, locator, monkeypatch):
+            monkeypatch.setattr(
+                mockbrowser, "find_by_name", lambda *_, **__: ["hidden"]
+            )
+            monkeypatch.setattr(mockbrowser, "execute_script", lambda *_: [-1, None])
+            expect(locator.find()) == None
+            expect(locator.index) == 0
+
+        def it_returns_none_when_missing(expect, mockbrowser, locator, monkeypatch):
+            monkeypatch.setattr(mockbrowser, "find_by_name", lambda *_, **__: [])
+            expect(locator.find()) == None
+
+        def it_waits_for_the_configured_timeout(expect, mockbrowser, locator, mocker):
+            mocker.patch.object(settings.timeouts, "modes", {"name": 2.5})
+            finder = mocker.spy(mockbrowser, "find_by_name")
+            locator.find()
+            finder.assert_called_once_with("email", wait_time=2.5)
+
+    def describe_exists():
+        def it_uses_probed_counts(expect, locator):
+            expect(locator.exists({("name", "email"): 1})) == True
+            expect(locator.exists({("name", "email"): 0})) == False
+
+        def it_falls_back_to_find(expect, mockbrowser, locator, mocker):
+            finder = mocker.spy(mockbrowser, "find_by_name")
+            expect(locator.exists({})) == True
+            finder.assert_called_once_with("email", wait_time=0.0)
+
+    def describe_record():
+        def it_updates_stats(expect, locator):
+            locator.record(True, 0.05)
+            locator.record(False, 0.05)
+            expect(locator.stats) == "1/2 0,0,2,0,0,0"
+
+        def it_omits_empty_stats_when_saved(expect, page):
+            page.locators.inclusions = [Locator("id", "username")]
+            action = getattr(page, "fill_email")
+            action.locators[0].record(True, 0.05)
+            text = page.datafile.text
+            expect(text.count("stats:")) == 1
+            expect(text).contains("stats: 1/1 0,0,1,0,0,0")
+
     def describe_score():
         def it_updates_uses(expect, locator):
             expect(locator.score(+1)) == True
@@ -103,6 +158,76 @@ def describe_action():
             modes = [locator.mode for locator in action.sorted_locators]
             expect(modes) == ["name", "id"]
 
+        def it_prefers_faster_locators(expect, action):
+            action.locators = [
+                Locator("xpath", "//input", uses=3, stats="3/3 0,0,0,0,3,0"),
+                Locator("id", "email", uses=1, stats="4/5 5,0,0,0,0,0"),
+            ]
+            modes = [locator.mode for locator in action.sorted_locators]
+            expect(modes) == ["id", "xpath"]
+
+        def it_keeps_untried_locators_behind_proven_ones(expect, action):
+            action.locators = [
+                Locator("xpath", "//input", uses=3, stats="3/3 0,0,0,0,3,0"),
+                Locator("id", "email", uses=1),
+                Locator("css", "#email", uses=2, stats="2/2 2,0,0,0,0,0"),
+            ]
+            modes = [locator.mode for locator in action.sorted_locators]
+            expect(modes) == ["css", "xpath", "id"]
+
+    def describe_locator_limits():
+        def it_uses_the_ranking_by_use(expect, action):
+            action.locators = [
+                Locator("xpath", "//input", uses=3, stats="3/3 0,0,0,0,3,0"),
+                Locator("id", "email", uses=1, stats="4/5 5,0,0,0,0,0"),
+            ]
+            expect(action._max_locator_uses) == 2  # pylint: disable=protected-access
+
+    def describe_racing_locators():
+        def it_defers_locators_without_visible_elements(
+            expect, action, mockbrowser, monkeypatch
+        ):
+            monkeypatch.setattr(mockbrowser, "execute_script", lambda *_: [0, 2])
+            action.locators = [
+                Locator("id", "email", uses=2),
+                Locator("name", "email", uses=1),
+            ]
+
+            locators = action._racing_locators()  # pylint: disable=protected-access
+
+            expect([locator.mode for locator in locators]) == ["name", "id"]
+            expect(action.locators[0].uses) == 2
+
+        def it_probes_again_when_batch_counts_are_stale(
+            expect, action, mockbrowser, monkeypatch
+        ):
+            monkeypatch.setattr(mockbrowser, "execute_script", lambda *_: [0, 2])
+            action.locators = [
+                Locator("id", "email", uses=2),
+                Locator("name", "email", uses=1),
+            ]
+            counts = {("id", "email"): 0, ("name", "email"): 0, ("id", "other"): 1}
+
+            locators = action._racing_locators(  # pylint: disable=protected-access
+                counts
+            )
+
+            expect([locator.mode for locator in locators]) == ["name", "id"]
+
+        def it_tries_all_locators_when_none_are_visible(
+            expect, action, mockbrowser, monkeypatch
+        ):
+            monkeypatch.setattr(mockbrowser, "execute_script", lambda *_: [0, 0])
+            action.locators = [
+                Locator("id", "email", uses=2),
+                Locator("name", "email", uses=1),
+            ]
+
+            locators = action._racing_locators()  # pylint: disable=protected-access
+
+            expect(len(locators)) == 2
+            expect(action.locators[0].uses) == 2
+
     def describe_locator():
         def it_returns_placeholder_when_no_locators_defined(expect, action):
             action.locators = []
@@ -182,6 +307,19 @@ def describe_page():
             expect(new_action.name) == "password"
             expect(len(new_action.locators)) > 1
 
+        def it_only_reloads_modified_files(expect, page, tmp_path, monkeypatch, mocker):
+            monkeypatch.chdir(tmp_path)
+            page.datafile.save()
+            load = mocker.spy(page.datafile, "load")
+
+            getattr(page, "fill_email")
+            getattr(page, "fill_email")
+            expect(load.call_count) == 1
+
+            page.datafile.path.write_text("actions: []\n")
+            getattr(page, "fill_email")
+            expect(load.call_count) == 2
+
         def it_rejects_invalid_actions(expect, page):
             with expect.raises(AttributeError):
                 getattr(page, "mash_password")
@@ -194,6 +332,15 @@ def describe_page():
         def it_matches_partial_html(expect, page, mockbrowser):
             expect(page).contains("world")
 
+        def it_matches_across_lines(expect, page, mockbrowser):
+            mockbrowser.html = "<p>Hello,</p>\n<p>world!</p>"
+            expect(page).contains("Hello,\nworld")
+            expect(page).excludes("Hello, world")
+
+        def it_does_not_build_the_full_text(expect, page, mockbrowser):
+            expect(page).contains("Hello")
+            expect(page.__dict__).excludes("text")
+
     def describe_clean():
         def it_removes_unused_locators(expect, page):
             page.locators.inclusions = [
@@ -211,6 +358,38 @@ def describe_page():
             expect(len(page.locators.inclusions)) == 1
             expect(len(page.locators.exclusions)) == 1
 
+    def describe_fill_many():
+        def it_saves_and_detects_the_page_once(expect, page, monkeypatch):
+            attempts = []
+            saves: list = []
+
+            def attempt(self, *args, _counts=None):
+                attempts.append((str(self), args))
+
+            monkeypatch.setattr(Action, "_attempt", attempt)
+            monkeypatch.setattr(models.writer, "save", saves.append)
+            monkeypatch.setattr(models, "auto", lambda: "<page>")
+
+            values = {"email": "foo@example.com", "password": "secret"}
+
+            expect(page.fill_many(values)) == "<page>"
+            expect(attempts) == [
+                ("fill_email", ("foo@example.com",)),
+                ("fill_password", ("secret",)),
+            ]
+            expect(len(saves)) == 1
+
+    def describe_text():
+        def it_skips_scripts_and_styles(expect, page, mockbrowser):
+            mockbrowser.html = (
+                "<style>p {}</style><p>Hello,  world!</p><script>x = 1;</script>"
+            )
+            expect(page.text) == "Hello,\nworld!"
+
+        def it_joins_lines_split_across_elements(expect, page, mockbrowser):
+            mockbrowser.html = "<p>Hello, <b>big</b> world!\nGoodbye.</p>"
+            expect(page.text) == "Hello, big world!\nGoodbye."
+
     def describe_properties():
         @pytest.mark.vcr()
         def it_computes_values_based_on_the_html(expect, page, mockbrowser):
@@ -222,4 +401,52 @@ def describe_page():
                 "domain in literature without prior coordination or asking for permission.\n"
                 "More information..."
             )
-            expect(page.identity) == 19078
+            expect(page.identity) == 3494458880332663
+
+
+def describe_probe():
+    def it_counts_elements_in_one_call(expect, mockbrowser, monkeypatch):
+        calls = []
+
+        def execute_script(script, queries):
+            calls.append(queries)
+            return [2, -1]
+
+        monkeypatch.setattr(mockbrowser, "execute_script", execute_script)
+        locators = [Locator("id", "foo"), Locator("css", "bar"), Locator("id", "foo")]
+
+        expect(probe(locators)) == {("id", "foo"): 2}
+        expect(len(calls)) == 1
+
+    def it_handles_unsupported_browsers(expect, mockbrowser):
+        expect(probe([Locator("id", "foo")])) == {}
+
+    def it_skips_locators_without_an_equivalent_query(expect, mockbrowser, monkeypatch):
+        calls = []
+
+        def execute_script(script, queries):
+            calls.append(queries)
+            return [1]
+
+        monkeypatch.setattr(mockbrowser, "execute_script", execute_script)
+        locators = [Locator("value", "Sign In"), Locator("name", "foo")]
+
+        expect(probe(locators, visible=True)) == {("name", "foo"): 1}
+        expect(calls) == [[[("css", '[name="foo"]')], True]]
+
+    def it_rules_out_attributes_missing_from_the_html(expect, mockbrowser, monkeypatch):
+        calls = []
+
+        def execute_script(script, queries):
+            calls.append(queries)
+            return [1]
+
+        monkeypatch.setattr(mockbrowser, "execute_script", execute_script)
+        locators = [Locator("id", "email"), Locator("id", "missing")]
+        html = '<input id="email">'
+
+        expect(probe(locators, html=html)) == {
+            ("id", "email"): 1,
+            ("id", "missing"): 0,
+        }
+        expect(calls) == [[[("xpath", '(//*[@id="email"])[1]')], False]]
@@ -0,0 +1,73 @@
+# pylint: disable=expression-not-assigned,unused-variable,redefined-outer-name,unused-argument
+
+import threading
+
+import pytest
+
+from .. import server
+
+
+@pytest.fixture
+def workers():
+    server.start(2)
+    yield server.workers
+    server.stop()
+
+
+def describe_worker():
+    def it_closes_the_browser_from_its_own_thread(expect, mocker):
+        threads = []
+        mocker.patch.object(server.browser, "launch")
+        mocker.patch.object(
+            server.browser,
+            "close",
+            side_effect=lambda _: threads.append(threading.get_ident()),
+        )
+        worker = server.Worker(0)
+        thread = worker.submit(threading.get_ident).result()
+
+        worker.close()
+
+        expect(threads) == [thread]
+        expect(worker.browser) == None
+
+
+def describe_choose():
+    def it_keeps_sessions_sticky(expect, workers):
+        workers[0].pending = 5
+        expect(server.choose("0")) == workers[0]
+
+    def it_picks_the_least_busy_worker(expect, workers):
+        workers[0].pending = 5
+        expect(server.choose(None)) == workers[1]
+        expect(server.choose("42")) == workers[1]
+
+
+def describe_status():
+    def it_reports_queue_depth(expect, workers):
+        workers[1].pending = 3
+        client = server.app.test_client()
+        data = client.get("/status").get_json()
+        expect(data["queue"]) == 3
+        expect(len(data["workers"])) == 2
+
+
+def describe_process():
+    @pytest.fixture
+    def page(mocker):
+        page = mocker.Mock(url="http://example.com", title="Example", text="Hello")
+        return page
+
+    def it_only_computes_requested_fields(expect, page):
+        url, transitioned, data, names = server.process(
+            "http://example.com", [], ["url", "text"], lambda url: page
+        )
+        expect(data) == {"url": "http://example.com", "text": "Hello"}
+        expect(page.soup.prettify.called) == False
+
+
+def describe_sites():
+    def it_rejects_unknown_fields(expect):
+        client = server.app.test_client()
+        response = client.get("/sites?url=http://example.com&fields=foobar")
+        expect(response.status_code) == 400
@@ -0,0 +1,161 @@
+# pylint: disable=unused-variable,expression-not-assigned,redefined-outer-name
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from pomace import shared
+
+from .conftest import MockBrowser
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.viewport_size = None
+        self.closed = False
+        self._handlers = {}
+
+    def on(self, event, handler):
+        self._handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+        self._handlers["close"](self)
+
+    def bring_to_front(self):
+        pass
+
+    def set_viewport_size(self, size):
+        self.viewport_size = size
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self._handlers = {}
+
+    def on(self, event, handler):
+        self._handlers[event] = handler
+
+    def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        self._handlers["page"](page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def new_context(self, **_kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+
+def describe_tabs():
+    @pytest.fixture
+    def tabs():
+        return shared.tabs(FakeBrowser())  # type: ignore
+
+    def it_reuses_the_active_page(expect, tabs):
+        page = tabs.page
+        expect(tabs.page).is_(page)
+        expect(len(tabs)) == 1
+
+    def it_activates_new_pages(expect, tabs):
+        first = tabs.page
+        second = tabs.open()
+        expect(tabs.page).is_(second)
+
+        second.close()
+        expect(tabs.page).is_(first)
+
+    def it_does_not_open_pages_to_read_the_current_one(expect, tabs):
+        expect(tabs.current) == None
+        expect(len(tabs)) == 0
+
+        page = tabs.page
+        expect(tabs.current).is_(page)
+
+    def it_activates_popups(expect, tabs):
+        popup = tabs.page.context.new_page()
+        expect(tabs.active).is_(popup)
+
+    def it_closes_the_least_recently_used_pages(expect, tabs, monkeypatch):
+        monkeypatch.setattr(shared.Tabs, "LIMIT", 2)
+        first = tabs.page
+        second = tabs.open()
+        tabs.activate(first)
+        tabs.open()
+
+        expect(second.closed) == True
+        expect(first.closed) == False
+        expect(len(tabs)) == 2
+
+    def it_closes_pages_beyond_the_limit_when_popups_open(expect, tabs, monkeypatch):
+        monkeypatch.setattr(shared.Tabs, "LIMIT", 1)
+        page = tabs.page
+        popup = page.context.new_page()
+
+        expect(page.closed) == True
+        expect(tabs.page).is_(popup)
+        expect(len(tabs)) == 1
+
+
+def describe_client():
+    def it_reads_no_url_from_playwright_without_pages(expect, monkeypatch):
+        monkeypatch.setattr(shared, "PlaywrightBrowser", FakeBrowser)
+        monkeypatch.setattr(shared, "browser", FakeBrowser())
+        expect(shared.client.url) == ""
+        expect(shared.browser.contexts) == []
+
+    @pytest.fixture
+    def reads(monkeypatch):
+        reads = []
+
+        class Browser(MockBrowser):
+            @property
+            def url(self):  # type: ignore
+                reads.append(1)
+                return "http://example.com"
+
+        monkeypatch.setattr(shared, "browser", Browser())
+        monkeypatch.setattr(shared.client, "_urls", {})
+        return reads
+
+    def it_caches_the_url_between_navigations(expect, reads):
+        expect(shared.client.url) == "http://example.com"
+        expect(shared.client.url) == "http://example.com"
+        expect(len(reads)) == 1
+
+        shared.client.invalidate()
+        expect(shared.client.url) == "http://example.com"
+        expect(len(reads)) == 2
+
+    def it_refreshes_the_url_after_a_delay(expect, reads, monkeypatch):
+        monkeypatch.setattr(shared.client, "URL_TTL", 0.0)
+        expect(shared.client.url) == "http://example.com"
+        expect(shared.client.url) == "http://example.com"
+        expect(len(reads)) == 2
+
+    def describe_wait_for_navigation():
+        def it_retries_while_the_page_is_unloading(expect, mockbrowser, mocker):
+            driver = mocker.Mock(current_url="http://example.com/next")
+            driver.execute_script.side_effect = [
+                WebDriverException("unloading"),
+                "complete",
+            ]
+            mockbrowser.driver = driver  # type: ignore
+
+            navigated = shared.client.wait_for_navigation(
+                "http://example.com", 1.0, "load"
+            )
+
+            expect(navigated) == True
+            expect(driver.execute_script.call_count) == 2
@@ -2,8 +2,9 @@
 
 import log
 import pytest
+from bs4 import BeautifulSoup
 
-from ..types import URL, Fake
+from ..types import URL, Fake, Fingerprint, Stats, URLPatterns
 
 
 @pytest.fixture
@@ -126,6 +127,80 @@ def describe_url():
             expect(url.value) == after
 
 
+def describe_url_patterns():
+    @pytest.fixture
+    def patterns():
+        patterns: URLPatterns[str] = URLPatterns()
+        for path in ["@", "{value}", "p/{name}", "p/new", "p/{name}/edit"]:
+            patterns.add(path, path)
+        return patterns
+
+    def it_matches_exact_paths_first(expect, patterns):
+        expect(patterns.match("p/new")) == ["p/new", "p/{name}"]
+
+    def it_matches_placeholders(expect, patterns):
+        expect(patterns.match("p/foobar")) == ["p/{name}"]
+        expect(patterns.match("p/foobar/edit")) == ["p/{name}/edit"]
+
+    def it_does_not_match_root_placeholder(expect, patterns):
+        expect(patterns.match("@")) == ["@"]
+
+    def it_does_not_match_extra_segments(expect, patterns):
+        expect(patterns.match("p/foo/bar")) == []
+
+
+def describe_fingerprint():
+    def _fingerprint(html: str) -> Fingerprint:
+        soup = BeautifulSoup(html, "html.parser")
+        return Fingerprint.from_soup(soup, soup.get_text())
+
+    @pytest.fixture
+    def html():
+        words = " ".join(f"word{index}" for index in range(100))
+        return (
+            f"<div><h1>Title</h1><p>{words}</p><ul><li>One</li><li>Two</li></ul></div>"
+        )
+
+    def it_matches_identical_pages(expect, html):
+        expect(_fingerprint(html)) == _fingerprint(html)
+
+    def it_detects_reordered_text(expect):
+        first = _fingerprint("<p>ab</p>")
+        second = _fingerprint("<p>ba</p>")
+        expect(first.digest) != second.digest
+
+    def it_detects_minor_changes(expect, html):
+        first = _fingerprint(html)
+        second = _fingerprint(html.replace("word42", "changed"))
+        expect(first.digest) != second.digest
+
+    def it_fits_in_a_javascript_number(expect, html):
+        expect(_fingerprint(html).digest) < 2**53
+
+
+def describe_stats():
+    def it_round_trips_through_text(expect):
+        stats = Stats()
+        stats.record(True, 0.005)
+        stats.record(False, 1.5)
+        expect(str(stats)) == "1/2 1,0,0,0,0,1"
+        expect(Stats.parse(str(stats))) == stats
+
+    def it_ignores_invalid_text(expect):
+        expect(Stats.parse("foobar")) == Stats()
+
+    def it_decays_old_attempts(expect):
+        stats = Stats(100, 100, [100, 0, 0, 0, 0, 0])
+        stats.record(False, 0.005)
+        expect(str(stats)) == "50/50 50,0,0,0,0,0"
+
+    def it_estimates_cost_to_first_success(expect):
+        fast = Stats.parse("9/10 10,0,0,0,0,0")
+        slow = Stats.parse("10/10 0,0,0,0,10,0")
+        expect(fast.cost) < slow.cost
+        expect(Stats().cost) == 4.0
+
+
 def describe_fake():
     @pytest.fixture
     def fake():
@@ -51,3 +51,32 @@ def describe_run_script():
         expect(post_mortem.call_count) == 1
         tb = post_mortem.call_args[0][0]
         expect(tb is not None) == True
+
+
+def describe_launch_browser():
+    @pytest.fixture
+    def standby(monkeypatch):
+        instance = Mock()
+        standby = Mock(ready=True)
+        standby.take.return_value = (instance, "http://example.com")
+        monkeypatch.setattr(utils, "standby", standby)
+        monkeypatch.setattr(utils.shared, "browser", None)
+        monkeypatch.setattr(utils.settings, "url", "http://example.com")
+        monkeypatch.setattr(utils.settings.browser, "standby", True)
+        monkeypatch.setattr(utils.settings, "framework", "splinter")
+        monkeypatch.setattr(utils.atexit, "register", Mock())
+        return standby
+
+    def it_uses_the_preloaded_standby_browser(expect, standby, monkeypatch):
+        launch = Mock()
+        visit = Mock()
+        monkeypatch.setattr(utils.browser, "launch", launch)
+        monkeypatch.setattr(utils.shared.client, "visit", visit)
+
+        expect(utils.launch_browser()) == True
+
+        expect(launch.call_count) == 0
+        expect(visit.call_count) == 0
+        standby.start.assert_called_once_with("http://example.com")
+        instance = standby.take.return_value[0]
+        expect(utils.browser.timings(instance)).contains("ready")
@@ -1,21 +1,26 @@
 import random
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
-from urllib.parse import urlparse
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from hashlib import blake2b
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar, Union
+from urllib.parse import ParseResult, urlparse
 from uuid import UUID
 
 import faker
 import inflection
 import log
+import parse
 import us
 import zipcodes
-from parse import parse
+from bs4 import BeautifulSoup
 from splinter.browser import ChromeWebDriver, FirefoxWebDriver
 from splinter.driver import ElementAPI as SplinterElements
 
 from .compat import PlaywrightBrowser, PlaywrightElement
 
-__all__ = ["URL"]
+__all__ = ["URL", "Fingerprint"]
+
+T = TypeVar("T")
 
 SplinterBrowser = Union[ChromeWebDriver, FirefoxWebDriver]
 GenericBrowser = Union[PlaywrightBrowser, SplinterBrowser]
@@ -36,6 +41,11 @@ def is_identifier(value: str) -> bool:
     return True
 
 
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str) -> parse.Parser:
+    return parse.compile(pattern)
+
+
 class URL:
 
     ROOT = "@"
@@ -64,7 +74,7 @@ class URL:
         if self.path == other.path:
             return True
 
-        result = parse(self.path, other.path)
+        result = compile_pattern(self.path).parse(other.path)
         if not result:
             return False
 
@@ -80,18 +90,22 @@ class URL:
     def __contains__(self, value):
         return value in self.value
 
+    @cached_property
+    def _parts(self) -> ParseResult:
+        return urlparse(self.value)
+
     @property
     def domain(self) -> str:
-        return urlparse(self.value).netloc
+        return self._parts.netloc
 
     @property
     def path(self) -> str:
-        path = urlparse(self.value).path.strip("/")
+        path = self._parts.path.strip("/")
         return path if path else self.ROOT
 
     @property
     def fragment(self) -> str:
-        return urlparse(self.value).fragment.replace("/", "_").strip("_")
+        return self._parts.fragment.replace("/", "_").strip("_")
 
     def detect_patterns(self) -> Tuple["URL", bool]:
         updated = False
@@ -110,6 +124,145 @@ class URL:
         return URL(self.domain, "/".join(parts)), updated
 
 
+@dataclass
+class _Node(Generic[T]):
+    literals: Dict[str, "_Node[T]"] = field(default_factory=dict)
+    placeholders: Dict[str, "_Node[T]"] = field(default_factory=dict)
+    values: List[T] = field(default_factory=list)
+
+
+class URLPatterns(Generic[T]):
+    """Trie of URL path patterns to match a path against many patterns at once."""
+
+    def __init__(self):
+        self._root: _Node[T] = _Node()
+
+    def add(self, path: str, value: T):
+        node = self._root
+        for segment in path.split("/"):
+            if "{" in segment:
+                node = node.placeholders.setdefault(segment, _Node())
+            else:
+                node = node.literals.setdefault(segment.lower(), _Node())
+        node.values.append(value)
+
+    def match(self, path: str) -> List[T]:
+        """Return values for matching patterns, most specific first."""
+        matches: List[Tuple[int, T]] = []
+        nodes = [(self._root, 0)]
+        for segment in path.split("/"):
+            found = []
+            for node, literals in nodes:
+                with_literal = node.literals.get(segment.lower())
+                if with_literal:
+                    found.append((with_literal, literals + 1))
+                if segment == URL.ROOT:
+                    continue
+                for pattern, child in node.placeholders.items():
+                    if compile_pattern(pattern).parse(segment):
+                        found.append((child, literals))
+            nodes = found
+        for node, literals in nodes:
+            matches.extend((literals, value) for value in node.values)
+        matches.sort(key=lambda match: match[0], reverse=True)
+        return [value for _literals, value in matches]
+
+
+def hash64(value: str) -> int:
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Hash of a page's structure and text, exact within JavaScript numbers."""
+
+    digest: int
+
+    BITS = 53
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup, text: str) -> "Fingerprint":
+        paths = "\n".join(cls._paths(soup))
+        return cls(hash64(paths + "\0" + text) >> (64 - cls.BITS))
+
+    @staticmethod
+    def _paths(soup: BeautifulSoup) -> Iterator[str]:
+        stack = [("", tag) for tag in reversed(soup.find_all(True, recursive=False))]
+        while stack:
+            parent, tag = stack.pop()
+            path = f"{parent}/{tag.name}"
+            yield path
+            children = tag.find_all(True, recursive=False)
+            stack.extend((path, child) for child in reversed(children))
+
+
+@dataclass
+class Stats:
+    """Success rate and resolve-latency histogram of a locator."""
+
+    successes: int = 0
+    attempts: int = 0
+    latency: List[int] = field(default_factory=lambda: [0] * 6)
+
+    BUCKETS = (0.01, 0.03, 0.1, 0.3, 1.0)
+    MIDPOINTS = (0.005, 0.02, 0.065, 0.2, 0.65, 2.0)
+    MAX_ATTEMPTS = 100
+
+    @classmethod
+    def parse(cls, value: str) -> "Stats":
+        if not value:
+            return cls()
+        try:
+            counts, histogram = value.split(" ")
+            successes, attempts = counts.split("/")
+            latency = [int(count) for count in histogram.split(",")]
+        except ValueError:
+            log.warn(f"Invalid locator stats: {value}")
+            return cls()
+        if len(latency) != len(cls.MIDPOINTS):
+            return cls(int(successes), int(attempts))
+        return cls(int(successes), int(attempts), latency)
+
+    def __str__(self) -> str:
+        if not self.attempts:
+            return ""
+        histogram = ",".join(str(count) for count in self.latency)
+        return f"{self.successes}/{self.attempts} {histogram}"
+
+    def record(self, success: bool, seconds: float):
+        bucket = len(self.BUCKETS)
+        for index, limit in enumerate(self.BUCKETS):
+            if seconds < limit:
+                bucket = index
+                break
+        self.latency[bucket] += 1
+        self.attempts += 1
+        self.successes += int(success)
+
+        if self.attempts > self.MAX_ATTEMPTS:
+            self.attempts //= 2
+            self.successes //= 2
+            self.latency = [count // 2 for count in self.latency]
+
+    @property
+    def rate(self) -> float:
+        """Success rate, assuming one success and one failure beforehand."""
+        return (self.successes + 1) / (self.attempts + 2)
+
+    @property
+    def mean(self) -> float:
+        """Mean resolve time, assuming the slowest bucket when unmeasured."""
+        total = sum(self.latency)
+        if not total:
+            return self.MIDPOINTS[-1]
+        return sum(c * t for c, t in zip(self.latency, self.MIDPOINTS)) / total
+
+    @property
+    def cost(self) -> float:
+        """Estimate seconds spent resolving until the first success."""
+        return self.mean / self.rate
+
+
 ALIASES = {
     "birthday": "date_of_birth",
     "cell_phone": "phone_number",
@@ -14,9 +14,13 @@ from gitman.models import Source
 from selenium.common.exceptions import WebDriverException
 from urllib3.exceptions import HTTPError
 
-from . import browser, shared
+from . import browser, daemon, shared
 from .config import settings
 
+standby = browser.Standby()
+atexit.register(standby.close)
+connection = daemon.Connection()
+
 
 def launch_browser(
     delay: float = 0.0,
@@ -25,6 +29,8 @@ def launch_browser(
     restore_previous_url: bool = True,
 ) -> bool:
     did_launch = False
+    preloaded_url = ""
+    start = time.perf_counter()
 
     if silence_logging:
         log.silence("urllib3.connectionpool")
@@ -37,19 +43,51 @@ def launch_browser(
             log.warn(str(e).strip())
             shared.browser = None
 
+    if not shared.browser and daemon.Connection.available():
+        try:
+            shared.browser = connection.attach()
+        except (OSError, ValueError, KeyError, WebDriverException) as e:
+            log.warn(f"Unable to attach to browser daemon: {e}")
+            connection.close()
+        else:
+            atexit.register(close_browser, silence_logging=silence_logging)
+            did_launch = True
+
     if not shared.browser:
-        shared.browser = browser.launch()
+        if standby.ready or _standby_enabled():
+            shared.browser, preloaded_url = standby.take()
+            if shared.browser:
+                log.info("Using standby browser")
+        if not shared.browser:
+            shared.browser = browser.launch()
         atexit.register(close_browser, silence_logging=silence_logging)
         did_launch = True
+        if _standby_enabled():
+            standby.start(settings.url if restore_previous_url else "")
 
     if restore_previous_url and settings.url:
-        size = settings.browser.size if did_launch else None
-        shared.client.visit(settings.url, size)
+        if preloaded_url != settings.url:
+            size = settings.browser.size if did_launch else None
+            shared.client.visit(settings.url, size)
         time.sleep(delay)
 
+    if did_launch:
+        elapsed = round(time.perf_counter() - start, 1)
+        browser.timings(shared.browser)["ready"] = elapsed
+        log.info(f"Browser ready for first action after {elapsed} seconds")
+
     return did_launch
 
 
+def _standby_enabled() -> bool:
+    if not settings.browser.standby:
+        return False
+    if settings.framework.lower() == "playwright":
+        log.debug("Standby browsers are not supported with Playwright")
+        return False
+    return True
+
+
 def close_browser(*, silence_logging: bool = False) -> bool:
     did_close = False
 
@@ -60,11 +98,16 @@ def close_browser(*, silence_logging: bool = False) -> bool:
         try:
             browser.save_url(shared.browser)
             browser.save_size(shared.browser)
-            browser.close(shared.browser)
+            if connection.attached:
+                log.debug("Detaching from browser daemon")
+                connection.close()
+            else:
+                browser.close(shared.browser)
         except Exception as e:
             log.debug(e)
         else:
             did_close = True
+        shared.client.invalidate()
         shared.browser = None
 
     path = Path().resolve()